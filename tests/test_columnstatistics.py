@@ -0,0 +1,92 @@
+"""
+Compares the kept column statistics with statistics computed from scratch.
+"""
+
+import random
+import unittest
+
+from tkintertable.ColumnStatistics import ColumnStatistics
+from tkintertable.TableModels import TableModel
+
+
+def randomValue(rnd):
+    return rnd.choice([None, '', rnd.randint(-100, 100), str(rnd.uniform(-5, 5)),
+                       'x'*rnd.randint(1, 12), {'formula': 'a'}])
+
+
+def summary(stats):
+    return (stats.count, stats.nulls, stats.numbers, stats.strings, stats.objects,
+            stats.minimum, stats.maximum, stats.maxlength)
+
+
+def computed(values):
+    stats = ColumnStatistics()
+    for v in values:
+        stats.add(v)
+    return stats
+
+
+class ColumnStatisticsTests(unittest.TestCase):
+
+    def test_counts(self):
+        stats = computed([None, '', 3, '2.5', 'abc', {'formula': 'a'}, True])
+        self.assertEqual(summary(stats), (7, 2, 2, 2, 1, 2.5, 3.0, 4))
+        self.assertFalse(stats.isNumeric())
+        self.assertTrue(computed(['1', 2, '']).isNumeric())
+
+    def test_add_and_remove(self):
+        rnd = random.Random(13)
+        values = []
+        stats = ColumnStatistics()
+        for _ in range(500):
+            if len(values) > 0 and rnd.random() < 0.4:
+                value = values.pop(rnd.randrange(len(values)))
+                stats.remove(value)
+            else:
+                value = randomValue(rnd)
+                values.append(value)
+                stats.add(value)
+            if stats.stale:
+                stats = computed(values)
+            self.assertEqual(summary(stats), summary(computed(values)))
+
+    def test_distinct_exact_below_k(self):
+        stats = computed(['a', 'b', 'a', 1, 1.0, '1', None, ''])
+        #1 and 1.0 are equal values
+        self.assertEqual(stats.distinctCount(), 4)
+
+    def test_distinct_estimate(self):
+        for n in [1000, 20000]:
+            stats = computed(['v%s' %(i % n) for i in range(2*n)])
+            estimate = stats.distinctCount()
+            self.assertLess(abs(estimate-n), 0.3*n, (n, estimate))
+
+
+class ModelStatisticsTests(unittest.TestCase):
+    """The model keeps the statistics up to date while it is edited"""
+
+    def test_edited_model(self):
+        rnd = random.Random(31)
+        model = TableModel()
+        model.addColumn('c')
+        for i in range(30):
+            model.addRow('r%s' %i, c=str(randomValue(rnd)))
+        model.getColumnStatistics('c')
+        for _ in range(200):
+            action = rnd.randrange(4)
+            if action == 0 and model.getRowCount() > 0:
+                model.deleteRow(key=rnd.choice(model.reclist))
+            elif action == 1:
+                name = 'r%s' %rnd.randrange(60)
+                if not model.hasRecord(name):
+                    model.addRow(name, c=str(rnd.randint(-100, 100)))
+            elif action == 2 and model.getRowCount() > 0:
+                model.setValueAt(str(rnd.randint(-100, 100)), rnd.randrange(model.getRowCount()), 0)
+            else:
+                model.autoAddRows(2)
+            values = [model.data[n].get('c') for n in model.reclist]
+            self.assertEqual(summary(model.getColumnStatistics('c')), summary(computed(values)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,310 @@
+"""
+Compares the filtering of table data with the set based doFiltering it
+replaced, on random data and random filters.
+"""
+
+import random
+import re
+import unittest
+
+from tkintertable.CellContentOperators import doFiltering, filterIndexed
+from tkintertable.VectorizedFiltering import FilterFrame
+from tkintertable.FilterIndexes import FilterIndexes, TrigramIndex, SortedIndex
+from tkintertable.Filtering import TableFilter
+from tkintertable.ParallelFiltering import ParallelFilter
+from tkintertable.TableModels import TableModel
+
+
+referenceoperators = {'=': lambda v1, v2: v1 == v2,
+                      '!=': lambda v1, v2: v1 != v2,
+                      '>': lambda v1, v2: v2 > v1,
+                      '<': lambda v1, v2: v2 < v1,
+                      'contains': lambda v1, v2: v1 in v2,
+                      'excludes': lambda v1, v2: not v1 in v2,
+                      'starts with': lambda v1, v2: v2.startswith(v1),
+                      'ends with': lambda v1, v2: v2.endswith(v1),
+                      'contains (c.ins.)': lambda v1, v2: v1.lower() in v2.lower(),
+                      'starts with (c.ins.)': lambda v1, v2: v2.lower().startswith(v1.lower()),
+                      'ends with (c.ins.)': lambda v1, v2: v2.lower().endswith(v1.lower()),
+                      'has length': lambda v1, v2: len(v2) > v1,
+                      'is number': lambda v1, v2: isnumber(v2),
+                      'regex': lambda v1, v2: len(re.findall(v1, v2)) > 0,
+                      'on': lambda v1, v2: v2 == v1,
+                      'before': lambda v1, v2: v2 < v1,
+                      'since': lambda v1, v2: v2 > v1}
+
+
+def isnumber(value):
+    try:
+        float(value)
+        return True
+    except:
+        return False
+
+
+def referenceFilterBy(data, filtercol, value, op, columndict):
+    """The row by row filter of CellContentOperators before it was compiled"""
+
+    func = referenceoperators[op]
+    if columndict is not None:
+        filtercol = columndict[filtercol]
+    if isinstance(data, dict):
+        keylist = data.keys()
+    else:
+        keylist = range(len(data))
+    rowIds = []
+    for rec in keylist:
+        if filtercol in data[rec]:
+            if op in ['=', '>', '<']:
+                try:
+                    item = float(data[rec][filtercol])
+                    v = float(value)
+                    if func(v, item) == True:
+                        rowIds.append(rec)
+                    continue
+                except:
+                    pass
+            item = str(data[rec][filtercol])
+            if func(value, item):
+                rowIds.append(rec)
+    return rowIds
+
+
+def referenceFiltering(data, columndict, filters):
+    """The set based CellContentOperators.doFiltering, the found record
+       keys are returned in data order"""
+
+    if filters == None or len(filters) == 0:
+        return None
+    sets = [(set(referenceFilterBy(data, col, val, op, columndict)), boolean)
+            for col, val, op, boolean in filters]
+    rowIds = sets[0][0]
+    for s, b in sets[1:]:
+        if b == 'AND':
+            rowIds = rowIds & s
+        elif b == 'OR':
+            rowIds = rowIds | s
+        elif b == 'NOT':
+            rowIds = rowIds - s
+    keys = data.keys() if isinstance(data, dict) else range(len(data))
+    return [k for k in keys if k in rowIds]
+
+
+textoperators = ['contains', 'excludes', 'starts with', 'ends with', 'contains (c.ins.)',
+                 'starts with (c.ins.)', 'ends with (c.ins.)', 'on', 'before', 'since']
+comparisons = ['=', '!=', '>', '<']
+
+
+def randomText(rnd):
+    return ''.join(rnd.choice('abAB1.-') for _ in range(rnd.randint(0, 5)))
+
+
+def randomCell(rnd):
+    kind = rnd.randrange(7)
+    if kind == 0:
+        return rnd.randint(-20, 20)
+    if kind == 1:
+        return round(rnd.uniform(-20, 20), 1)
+    if kind == 2:
+        return str(rnd.randint(-20, 20))
+    if kind == 3:
+        return rnd.choice(['', 'nan', 'inf', '1e1', float('nan')])
+    return randomText(rnd)
+
+
+def randomRows(rnd, n, columns=('x', 'y', 'z')):
+    rows = []
+    for _ in range(n):
+        rows.append({c: randomCell(rnd) for c in columns if rnd.random() < 0.85})
+    return rows
+
+
+def randomTerm(rnd, columns=('x', 'y', 'z')):
+    col = rnd.choice(columns)
+    kind = rnd.randrange(10)
+    if kind < 4:
+        op = rnd.choice(textoperators)
+        value = randomText(rnd)
+        if rnd.random() < 0.5:
+            value = value+randomText(rnd)+randomText(rnd)
+    elif kind < 8:
+        op = rnd.choice(comparisons)
+        value = rnd.choice([str(rnd.randint(-20, 20)), randomText(rnd), 'nan', '', '1e1'])
+    elif kind == 8:
+        op = rnd.choice(['has length', 'is number'])
+        value = rnd.randint(0, 4)
+    else:
+        op = 'regex'
+        value = rnd.choice(['a.', '^1', 'b$', '[AB]', '-?1'])
+    return col, value, op
+
+
+def randomFilters(rnd, columns=('x', 'y', 'z')):
+    filters = []
+    for i in range(rnd.randint(1, 4)):
+        boolean = rnd.choice(['AND', 'OR', 'NOT'])
+        filters.append(randomTerm(rnd, columns)+(boolean,))
+    return filters
+
+
+class RandomFilterTests(unittest.TestCase):
+
+    trials = 300
+
+    def data(self, rnd):
+        rows = randomRows(rnd, rnd.randint(0, 60))
+        if rnd.random() < 0.5:
+            return rows
+        return {'r%s' %i: row for i, row in enumerate(rows)}
+
+    def columndict(self, rnd):
+        if rnd.random() < 0.5:
+            return None
+        return {'x': 'x', 'y': 'y', 'z': 'z'}
+
+    def test_compiled(self):
+        rnd = random.Random(19)
+        for _ in range(self.trials):
+            data, columndict, filters = self.data(rnd), self.columndict(rnd), randomFilters(rnd)
+            self.assertEqual(doFiltering(data, columndict, filters),
+                             referenceFiltering(data, columndict, filters), filters)
+
+    def test_vectorized(self):
+        rnd = random.Random(20)
+        for _ in range(self.trials):
+            data, columndict, filters = self.data(rnd), self.columndict(rnd), randomFilters(rnd)
+            self.assertEqual(FilterFrame(data).doFiltering(filters, columndict),
+                             referenceFiltering(data, columndict, filters), filters)
+
+    def checkIndexed(self, rnd, kinds):
+        for _ in range(self.trials):
+            data, columndict = self.data(rnd), self.columndict(rnd)
+            indexes = FilterIndexes(data, kinds)
+            for _ in range(3):
+                filters = randomFilters(rnd)
+                self.assertEqual(doFiltering(data, columndict, filters, indexes=indexes),
+                                 referenceFiltering(data, columndict, filters), filters)
+
+    def test_trigram_indexed(self):
+        self.checkIndexed(random.Random(21), (TrigramIndex,))
+
+    def test_filter_indexed(self):
+        rnd = random.Random(26)
+        narrowed = 0
+        for _ in range(self.trials):
+            data, columndict = self.data(rnd), self.columndict(rnd)
+            filters = randomFilters(rnd)
+            found = filterIndexed(data, columndict, filters, FilterIndexes(data))
+            if found is not None:
+                narrowed += 1
+                self.assertEqual(found, referenceFiltering(data, columndict, filters), filters)
+        self.assertGreater(narrowed, 0)
+
+    def test_sorted_indexed(self):
+        self.checkIndexed(random.Random(22), (SortedIndex,))
+
+    def test_combined_indexes(self):
+        self.checkIndexed(random.Random(24), (TrigramIndex, SortedIndex))
+
+    def test_masks(self):
+        data = {'a': {}, 'b': {}, 'c': {}}
+        indexes = FilterIndexes(data)
+        mask = indexes.getMask({'c', 'a'})
+        self.assertEqual(mask.tolist(), [True, False, True])
+        self.assertEqual(indexes.getRowIds(mask), ['a', 'c'])
+        indexes.remove('a', data.pop('a'))
+        data['d'] = {}
+        indexes.add('d', data['d'])
+        mask = indexes.getMask({'d', 'b'})
+        self.assertEqual(indexes.getRowIds(mask), ['b', 'd'])
+
+    def test_rows(self):
+        rnd = random.Random(23)
+        for _ in range(self.trials):
+            data, filters = randomRows(rnd, 40), randomFilters(rnd)
+            rows = sorted(rnd.sample(range(40), 20))
+            expected = [r for r in referenceFiltering(data, None, filters) if r in rows]
+            self.assertEqual(doFiltering(data, None, filters, rows=rows), expected, filters)
+
+    def test_cached_refinements(self):
+        rnd = random.Random(23)
+
+        class Filter(TableFilter):
+            filters = None
+            def updateResults(self, rownames):
+                return
+            def getFilterStructure(self):
+                return self.filters
+
+        for _ in range(self.trials//10):
+            data = randomRows(rnd, 60)
+            tablefilter = Filter()
+            version = 0
+            filters = []
+            for _ in range(8):
+                col, value, op = randomTerm(rnd)
+                if len(filters) > 0 and rnd.random() < 0.5:
+                    #narrow or repeat the last filter
+                    col, value, op, boolean = filters[-1]
+                    if isinstance(value, str) and op in textoperators[:3]:
+                        value = value+randomText(rnd)
+                    filters = filters[:-1]+[(col, value, op, boolean)]
+                if rnd.random() < 0.2:
+                    data[rnd.randrange(60)]['x'] = randomCell(rnd)
+                    version += 1
+                filters = filters+[(col, value, op, rnd.choice(['AND', 'OR', 'NOT']))]
+                tablefilter.filters = filters
+                self.assertEqual(tablefilter.doFiltering(data, dataversion=version),
+                                 referenceFiltering(data, None, filters), filters)
+
+
+class ModelFilterTests(unittest.TestCase):
+    """The model keeps its filter indexes up to date while it is edited"""
+
+    def test_edited_model(self):
+        rnd = random.Random(22)
+        for _ in range(20):
+            model = TableModel()
+            for col in ['x', 'y', 'z']:
+                model.addColumn(col)
+            for i, row in enumerate(randomRows(rnd, 30)):
+                model.addRow('r%s' %i, **row)
+            for _ in range(30):
+                action = rnd.randrange(5)
+                if action == 0 and model.getRowCount() > 0:
+                    model.deleteRow(key=rnd.choice(model.reclist))
+                elif action == 1:
+                    name = 'r%s' %rnd.randrange(40)
+                    if not model.hasRecord(name):
+                        model.addRow(name, **randomRows(rnd, 1)[0])
+                elif action == 2 and model.getRowCount() > 0:
+                    model.setValueAt(str(randomCell(rnd)), rnd.randrange(model.getRowCount()),
+                                     rnd.randrange(3))
+                elif action == 3 and model.getRowCount() > 0:
+                    name = 'n%s' %rnd.randrange(40)
+                    if not model.hasRecord(name):
+                        model.setRecName(name, rnd.randrange(model.getRowCount()))
+                filters = randomFilters(rnd)
+                self.assertEqual(model.doFiltering(model.data, None, filters),
+                                 referenceFiltering(model.data, None, filters), filters)
+
+
+class ParallelFilterTests(unittest.TestCase):
+
+    def test_parallel(self):
+        rnd = random.Random(25)
+        data = randomRows(rnd, 400)
+        parallel = ParallelFilter(data, processes=2, chunksize=50)
+        try:
+            for _ in range(30):
+                filters = randomFilters(rnd)
+                progress = []
+                self.assertEqual(parallel.doFiltering(filters, progresscallback=progress.append),
+                                 referenceFiltering(data, None, filters), filters)
+                self.assertEqual(progress[-1], 1.0)
+        finally:
+            parallel.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
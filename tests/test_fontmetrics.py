@@ -0,0 +1,54 @@
+"""
+Tests of the stored character widths of FontMetrics, without a Tk display.
+"""
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from tkintertable import FontMetrics as fm
+
+
+class _Font(object):
+
+    def actual(self):
+        return {'family': 'Arial', 'size': 12, 'weight': 'normal', 'slant': 'roman'}
+
+    def measure(self, char):
+        return 7
+
+
+class StoredMetricsTests(unittest.TestCase):
+
+    def setUp(self):
+        fm._metrics.clear()
+        fm._loaded.clear()
+
+    tearDown = setUp
+
+    def test_scaling_in_key(self):
+        self.assertNotEqual(fm.fontKey(_Font(), 1.0), fm.fontKey(_Font(), 2.0))
+
+    def test_roundtrip(self):
+        key = fm.fontKey(_Font(), 1.5)
+        metrics = fm.FontMetrics(_Font(), key)
+        metrics.measureText('ab')
+        fm._metrics[key] = metrics
+        with tempfile.TemporaryDirectory() as cachedir:
+            fm.saveFontMetrics(cachedir)
+            self.assertFalse(metrics.changed)
+            fm._metrics.clear()
+            fm.loadFontMetrics(cachedir)
+        self.assertEqual(fm._metrics[key].widths, {'a': 7, 'b': 7})
+
+    def test_unscaled_keys_ignored(self):
+        with tempfile.TemporaryDirectory() as cachedir:
+            with open(os.path.join(cachedir, fm.METRICS_FILE), 'wb') as fd:
+                pickle.dump({('Arial', 12, 'normal', 'roman'): {'a': 7}}, fd)
+            fm.loadFontMetrics(cachedir)
+        self.assertEqual(fm._metrics, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
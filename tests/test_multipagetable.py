@@ -0,0 +1,193 @@
+"""
+Tests of the rows MultipageTable shows for a sort order and a filter. The
+tables are set up without their widgets, only the row logic is used.
+"""
+
+import random
+import time
+import unittest
+
+import numpy as np
+
+from tkintertable.Filtering import TableFilter
+from tkintertable.MultipageTable import MultipageTable, RowView
+from tkintertable.Sorting import TableSorter
+
+
+class RowViewTests(unittest.TestCase):
+
+    def test_sequence(self):
+        data = [{'v': i} for i in range(6)]
+        view = RowView(data, np.array([4, 0, 2]))
+        self.assertEqual(len(view), 3)
+        self.assertIs(view[0], data[4])
+        self.assertIs(view[-1], data[2])
+        self.assertEqual(view[1:], [data[0], data[2]])
+        self.assertEqual(list(view), [data[4], data[0], data[2]])
+
+
+class _Navigation(object):
+
+    def __init__(self, pagerange):
+        self.pagerange = pagerange
+        self.n = None
+
+    def getStateData(self):
+        return {'page_range': self.pagerange}
+
+    def updateN(self, n):
+        self.n = n
+
+
+def createTable(data, pagerange=(0, 3)):
+    """A MultipageTable without widgets, the shown page is recorded"""
+    table = object.__new__(MultipageTable)
+    table._data = data
+    table._sortorder = None
+    table._filterids = None
+    table._view = None
+    table._sortjob = None
+    table._sortgeneration = 0
+    table._filterframe = None
+    table._filterindexes = None
+    table._parallelfilter = None
+    table.getColumnDict = lambda: {'v': 'v'}
+    table.sortProgressCallback = None
+    table.sortErrorCallback = None
+    table.sortPollInterval = 0
+    table.polls = []
+    table.after = lambda ms, func, *args: table.polls.append((func, args))
+    table._navtab = _Navigation(pagerange)
+    table.pages = []
+    table._changePage = lambda: table.pages.append(
+        [row['v'] for row in table._getPageRows(table._getPageDataRange())])
+    return table
+
+
+class ShownRowsTests(unittest.TestCase):
+
+    def test_sorted_and_filtered(self):
+        rnd = random.Random(18)
+        for _ in range(50):
+            n = rnd.randint(0, 40)
+            data = [{'v': rnd.randint(0, 9)} for _ in range(n)]
+            table = createTable(data, (0, n))
+            order = np.array(sorted(range(n), key=lambda i: -data[i]['v']), dtype=np.intp)
+            table._sortorder = order
+            table._updateView()
+            self.assertEqual(list(table._getShownData()), [data[i] for i in order])
+            passing = [i for i in range(n) if data[i]['v'] > 4]
+            table._setFilteredData(passing)
+            self.assertEqual(table._navtab.n, len(passing))
+            #the filtered rows keep the sort order
+            self.assertEqual(list(table._getShownData()), [data[i] for i in order if i in passing])
+            self.assertEqual(list(table._getUnsortedData()), [data[i] for i in passing])
+            table.revertSorting()
+            self.assertEqual(list(table._getShownData()), [data[i] for i in passing])
+            table.showAll()
+            self.assertEqual(table._navtab.n, n)
+            self.assertIs(table._getShownData(), data)
+
+    def test_unordered_filter_ids(self):
+        data = [{'v': i} for i in range(5)]
+        table = createTable(data)
+        table._setFilteredData([3, 1, 3])
+        self.assertEqual(table.pages[-1], [1, 3])
+
+
+class FilterCallbackTests(unittest.TestCase):
+    """The table passes its filter function and the data version with the
+    filter callback, also through a function wrapping the TableFilter"""
+
+    class Filter(TableFilter):
+        filters = [('v', '5', '<', 'AND')]
+        def updateResults(self, rownames):
+            return
+        def getFilterStructure(self):
+            return self.filters
+
+    def test_wrapped_callback(self):
+        data = [{'v': i % 8} for i in range(20)]
+        table = createTable(data)
+        calls = []
+        filterdata = table._doFiltering
+        def spy(*args, **kwargs):
+            calls.append(args[2])
+            return filterdata(*args, **kwargs)
+        table._doFiltering = spy
+        tablefilter = self.Filter()
+        callback = lambda data, columndict, **kwargs: tablefilter.doFiltering(data, columndict, **kwargs)
+        self.assertEqual(table.triggerFiltering(callback), 14)
+        self.assertEqual(table.pages[-1], [0, 1, 2])
+        self.assertEqual(table.triggerFiltering(callback), 14)
+        #the repeated filter is taken from the cache
+        self.assertEqual(calls, [tablefilter.filters])
+
+
+class Sorter(TableSorter):
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    def getSortSpecification(self):
+        return self.spec
+
+
+def finishSorting(table):
+    """Run the polls of the background sort until it is done"""
+    while len(table.polls) > 0:
+        func, args = table.polls.pop(0)
+        if not args[0]['done']:
+            time.sleep(0.001)
+        func(*args)
+
+
+class BackgroundSortingTests(unittest.TestCase):
+
+    def test_sorter(self):
+        data = [{'v': (7*i) % 10} for i in range(10)]
+        table = createTable(data)
+        table.triggerSorting(Sorter([('v', True)]))
+        #the sorted head is shown before the sort is done
+        self.assertEqual(table.pages[-1], [9, 8, 7])
+        finishSorting(table)
+        self.assertEqual([row['v'] for row in table._getShownData()], list(range(9, -1, -1)))
+
+    def test_filtered_while_sorting(self):
+        data = [{'v': (7*i) % 10} for i in range(10)]
+        table = createTable(data)
+        table.triggerSorting(Sorter([('v', True)]))
+        table._setFilteredData([i for i in range(10) if data[i]['v'] % 2 == 0])
+        #the head is selected again from the filtered rows
+        self.assertEqual(table.pages[-1], [8, 6, 4])
+        finishSorting(table)
+        self.assertEqual([row['v'] for row in table._getShownData()], [8, 6, 4, 2, 0])
+
+    def test_function(self):
+        data = [{'v': (7*i) % 10} for i in range(10)]
+        table = createTable(data)
+        table.triggerSorting(lambda rows, columndict: rows.sort(key=lambda row: row['v']))
+        finishSorting(table)
+        self.assertEqual(table.pages[-1], [0, 1, 2])
+        self.assertEqual([row['v'] for row in table._getShownData()], list(range(10)))
+
+    def test_error(self):
+        data = [{'v': (7*i) % 10} for i in range(10)]
+        table = createTable(data)
+        table.triggerSorting(Sorter([('v', False)]))
+        finishSorting(table)
+        errors = []
+        table.sortErrorCallback = errors.append
+        table.getColumnDict = lambda: {'v': 'v', 'w': 'w'}
+        table.triggerSorting(Sorter([('v', True), ('w', False)]))
+        with self.assertLogs('tkintertable.MultipageTable', 'ERROR'):
+            finishSorting(table)
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], KeyError)
+        self.assertFalse(table.isSorting())
+        #the rows keep the previous order
+        self.assertEqual(table.pages[-1], [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
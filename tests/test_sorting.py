@@ -0,0 +1,165 @@
+"""
+Compares the sorting of TableModel with the plain sort it replaced, over
+random edits, deletions and additions of records, and the single pass
+sort of Sorting with one sort per key.
+"""
+
+import operator
+import random
+import unittest
+
+from tkintertable.TableModels import TableModel, ColumnarTableModel
+from tkintertable.Sorting import getSortPermutation, doSorting
+
+
+def referenceSortMap(model, names, sortkey, reverse=0):
+    """The sort of TableModel.createSortMap before the keys were kept"""
+
+    recdata = [model.getRecordAttributeAtColumn(recName=rec, columnName=sortkey)
+               for rec in names]
+    try:
+        recdata = model.toFloats(recdata)
+    except:
+        pass
+    smap = sorted(zip(names, recdata), key=operator.itemgetter(1), reverse=reverse)
+    return [n for n, _ in smap]
+
+
+def randomValue(rnd, numeric):
+    if numeric:
+        return rnd.choice(['', str(rnd.randint(-50, 50)), '%.2f' %rnd.uniform(-5, 5)])
+    return rnd.choice(['', 'a', 'b', 'ab', 'B', str(rnd.randint(0, 9))])
+
+
+class SortOrderTests(unittest.TestCase):
+
+    modelclass = TableModel
+
+    def createModel(self, rnd):
+        model = self.modelclass()
+        model.addColumn('num')
+        model.addColumn('text')
+        for i in range(30):
+            model.addRow('r%s' %i, num=randomValue(rnd, True), text=randomValue(rnd, False))
+        return model
+
+    def checkSort(self, model, colname, reverse):
+        expected = referenceSortMap(model, model.reclist, colname, reverse)
+        model.setSortOrder(columnName=colname, reverse=reverse)
+        self.assertEqual(model.reclist, expected)
+
+    def test_random_edits(self):
+        rnd = random.Random(14)
+        for _ in range(20):
+            model = self.createModel(rnd)
+            for _ in range(60):
+                action = rnd.randrange(8)
+                if action == 0 and model.getRowCount() > 0:
+                    model.deleteRow(key=rnd.choice(model.reclist))
+                elif action == 1 and model.getRowCount() > 0:
+                    model.deleteRows(keys=rnd.sample(model.reclist, min(3, model.getRowCount())))
+                elif action == 2:
+                    name = 'r%s' %rnd.randrange(40)
+                    if not model.hasRecord(name):
+                        model.addRow(name, **{rnd.choice(['num', 'text']): randomValue(rnd, True)})
+                elif action == 3:
+                    model.autoAddRows(rnd.randint(1, 3))
+                elif action == 4 and model.getRowCount() > 0:
+                    col = rnd.randrange(2)
+                    model.setValueAt(randomValue(rnd, col == 0), rnd.randrange(model.getRowCount()), col)
+                elif action == 5 and model.getRowCount() > 0:
+                    name = 'n%s' %rnd.randrange(40)
+                    if not model.hasRecord(name):
+                        model.setRecName(name, rnd.randrange(model.getRowCount()))
+                elif action == 6 and rnd.random() < 0.2:
+                    model.deleteRows()
+                self.checkSort(model, rnd.choice(['num', 'text']), rnd.choice([0, 1]))
+
+    def test_readded_record(self):
+        model = TableModel()
+        model.addColumn('c1')
+        model.addColumn('c2')
+        for i in range(10):
+            model.addRow('r%s' %i, c1=str(10-i))
+        self.checkSort(model, 'c1', 1)
+        model.deleteRow(key='r0')
+        model.addRow('r0', c2='5')
+        self.checkSort(model, 'c1', 0)
+
+    def test_autoadded_after_delete_all(self):
+        model = TableModel(rows=5, columns=2)
+        model.setValueAt('3', 4, 0)
+        self.checkSort(model, '1', 1)
+        model.deleteRows()
+        model.autoAddRows(5)
+        self.checkSort(model, '1', 1)
+
+
+columnkinds = {
+    'ints': lambda rnd: rnd.randint(-5, 5),
+    'bigints': lambda rnd: rnd.choice([2**53, 2**53+1, -2**53-1, 2**64, rnd.randint(-5, 5)]),
+    'floats': lambda rnd: rnd.choice([0.5, -1.25, 3.0, rnd.uniform(-5, 5)]),
+    'mixed': lambda rnd: rnd.choice([2**53+1, 2**53, 1.5, 2, 2.0, rnd.randint(-5, 5)]),
+    'strings': lambda rnd: rnd.choice(['', 'a', 'a\x00', 'b', 'B', 'ab\x00\x00', 'ab']),
+    'nan': lambda rnd: rnd.choice([float('nan'), 1.0, 2.0, -1.0]),
+    'bools': lambda rnd: rnd.choice([True, False]),
+    'unordered': lambda rnd: rnd.choice(['a', 1, 2.5]),
+}
+
+
+def randomSortData(rnd, kinds, n, missing):
+    rows = []
+    for _ in range(n):
+        rows.append({k: columnkinds[k](rnd) for k in kinds if not missing or rnd.random() < 0.8})
+    return rows
+
+
+def sortOrder(data, spec, composite):
+    try:
+        return getSortPermutation(data, spec, composite=composite).tolist()
+    except TypeError:
+        return TypeError
+
+
+class SortPermutationTests(unittest.TestCase):
+
+    def test_large_ints_and_floats(self):
+        rows = [{'c': 2**53+1}, {'c': 2**53}, {'c': 1.5}]
+        self.assertEqual(getSortPermutation(rows, [('c', False)]).tolist(), [2, 1, 0])
+
+    def test_trailing_nul(self):
+        rows = [{'c': 'a\x00'}, {'c': 'a'}, {'c': 'a\x00'}]
+        self.assertEqual(getSortPermutation(rows, [('c', False)]).tolist(), [1, 0, 2])
+
+    def test_composite_same_as_multipass(self):
+        rnd = random.Random(15)
+        for _ in range(300):
+            kinds = rnd.sample(sorted(columnkinds), rnd.randint(1, 3))
+            spec = [(k, rnd.choice([False, True])) for k in kinds]
+            if rnd.random() < 0.5:
+                data = randomSortData(rnd, kinds, rnd.randint(0, 30), False)
+            else:
+                rows = randomSortData(rnd, kinds, rnd.randint(0, 30), True)
+                names = ['r%s' %i for i in range(len(rows))]
+                rnd.shuffle(names)
+                data = (dict(zip(names, rows)), names)
+            expected = sortOrder(data, spec, False)
+            self.assertEqual(sortOrder(data, spec, True), expected, (spec, data))
+
+    def test_doSorting(self):
+        rnd = random.Random(16)
+        rows = randomSortData(rnd, ['ints', 'strings'], 50, False)
+        spec = [('strings', True), ('ints', False)]
+        expected = sorted(rows, key=lambda r: r['ints'])
+        expected.sort(key=lambda r: r['strings'], reverse=True)
+        doSorting(rows, spec)
+        self.assertEqual(rows, expected)
+
+
+class ColumnarSortOrderTests(SortOrderTests):
+
+    modelclass = ColumnarTableModel
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Compares the row positions computed from sparse row heights with offsets
+summed over all rows.
+"""
+
+import bisect
+import pickle
+import random
+import unittest
+
+from tkintertable.TableLayout import CumulativePositions, RowHeights, RowPositions
+
+
+def referenceOffsets(heights, rows, default, start):
+    offsets = [start]
+    for row in range(rows):
+        offsets.append(offsets[-1]+heights.get(row, default))
+    return offsets
+
+
+class RowPositionsTests(unittest.TestCase):
+
+    def checkPositions(self, heights, rows, default=20, start=3):
+        expected = referenceOffsets(dict(heights), rows, default, start)
+        positions = RowPositions(heights, rows, default, start)
+        self.assertEqual(len(positions), rows+1)
+        self.assertEqual(list(positions), expected)
+        self.assertEqual(positions[-1], expected[-1])
+        self.assertEqual(positions.end(), expected[-1])
+        for value in [0, start, expected[-1], expected[-1]+1]+[o+0.5 for o in expected[::7]]:
+            self.assertEqual(positions.find(value), bisect.bisect_left(expected, value))
+        cumulative = CumulativePositions([heights.get(r, default) for r in range(rows)], start)
+        self.assertEqual(list(cumulative), expected)
+        for row in range(rows):
+            self.assertEqual(positions.size(row), cumulative.size(row))
+
+    def test_random_changes(self):
+        rnd = random.Random(7)
+        heights = RowHeights()
+        rows = 60
+        for _ in range(300):
+            action = rnd.randrange(6)
+            row = rnd.randrange(rows)
+            if action < 2:
+                heights[row] = rnd.randint(5, 60)
+            elif action == 2 and len(heights) > 0:
+                del heights[rnd.choice(list(heights))]
+            elif action == 3:
+                heights.pop(row, None)
+            elif action == 4:
+                heights.update({rnd.randrange(rows): rnd.randint(5, 60) for _ in range(3)})
+            elif rnd.random() < 0.1:
+                heights.clear()
+            self.checkPositions(heights, rows)
+
+    def test_version(self):
+        heights = RowHeights({3: 40})
+        version = heights.version
+        heights[3] = 40
+        self.assertEqual(heights.version, version)
+        heights[3] = 41
+        self.assertGreater(heights.version, version)
+
+    def test_pickle(self):
+        heights = RowHeights({5: 30, 1: 10})
+        copied = pickle.loads(pickle.dumps(heights))
+        self.assertIsInstance(copied, RowHeights)
+        self.assertEqual(copied, heights)
+        self.checkPositions(copied, 10)
+
+    def test_update(self):
+        heights = RowHeights()
+        positions = RowPositions(heights, 10, 20)
+        positions.update(4, 50)
+        self.assertEqual(positions[5], 4*20+50)
+        self.assertEqual(positions.end(), 9*20+50)
+
+
+if __name__ == '__main__':
+    unittest.main()
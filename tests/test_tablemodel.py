@@ -0,0 +1,118 @@
+"""
+Tests of the records, rows and kept column values of TableModel.
+"""
+
+import random
+import unittest
+
+from tkintertable.TableModels import TableModel, RecordIndex
+
+
+class RecordIndexTests(unittest.TestCase):
+
+    def test_lookup(self):
+        names = ['a', 'b', 'c']
+        index = RecordIndex()
+        self.assertEqual(index.lookup(names, 'c'), 2)
+        self.assertIsNone(index.lookup(names, 'x'))
+        names.append('d')
+        index.extended(names)
+        self.assertEqual(index.lookup(names, 'd'), 3)
+        #reordered in place
+        names.reverse()
+        self.assertEqual(index.lookup(names, 'a'), 3)
+        names[0] = 'e'
+        index.renamed('d', 'e')
+        self.assertEqual(index.lookup(names, 'e'), 0)
+        self.assertIsNone(index.lookup(names, 'd'))
+        #another list
+        self.assertEqual(index.lookup(['x', 'a'], 'a'), 1)
+
+    def test_model_positions(self):
+        rnd = random.Random(2)
+        model = TableModel()
+        model.addColumn('c')
+        for i in range(20):
+            model.addRow('r%s' %i, c=str(rnd.randint(0, 9)))
+        for _ in range(200):
+            action = rnd.randrange(5)
+            if action == 0:
+                name = 'r%s' %rnd.randrange(40)
+                if not model.hasRecord(name):
+                    model.addRow(name, c=str(rnd.randint(0, 9)))
+            elif action == 1 and model.getRowCount() > 1:
+                model.deleteRow(key=rnd.choice(model.reclist))
+            elif action == 2:
+                model.setSortOrder(columnName='c', reverse=rnd.choice([0, 1]))
+            elif action == 3 and model.getRowCount() > 0:
+                name = 'n%s' %rnd.randrange(40)
+                if not model.hasRecord(name):
+                    model.setRecName(name, rnd.randrange(model.getRowCount()))
+            else:
+                model.autoAddRows(2)
+            for name in rnd.sample(model.reclist, min(5, model.getRowCount())):
+                self.assertEqual(model.getRecordIndex(name), model.reclist.index(name))
+            self.assertFalse(model.hasRecord('missing'))
+
+
+class DeleteRowsTests(unittest.TestCase):
+
+    def createModel(self, rnd, n=30):
+        model = TableModel()
+        model.addColumn('c')
+        for i in range(n):
+            model.addRow('r%s' %i, c=str(rnd.randint(0, 9)))
+        for row in rnd.sample(range(n), 5):
+            model.setColorAt(row, 0, 'red')
+        for row in rnd.sample(range(n), 5):
+            model.rowheights[row] = 30+row
+        return model
+
+    def test_rows(self):
+        rnd = random.Random(3)
+        for _ in range(50):
+            model = self.createModel(rnd)
+            rows = rnd.sample(range(30), rnd.randint(1, 10))
+            names = [model.getRecName(r) for r in rows]
+            heights = dict(model.rowheights)
+            colored = set(model.colors['bg'])
+            reclist = [n for n in model.reclist if n not in names]
+            model.deleteRows(rows)
+            self.assertEqual(model.reclist, reclist)
+            self.assertEqual(sorted(model.data), sorted(reclist))
+            self.assertEqual(set(model.colors['bg']), colored-set(names))
+            #rows below deleted rows move up
+            kept = sorted(r for r in range(30) if r not in rows)
+            self.assertEqual(dict(model.rowheights),
+                             {kept.index(r): h for r, h in heights.items() if r not in rows})
+            for name in reclist:
+                self.assertEqual(model.getRecordIndex(name), reclist.index(name))
+
+    def test_by_keys_and_all(self):
+        model = self.createModel(random.Random(4), 10)
+        model.deleteRows(keys=['r3', 'r7', 'missing'])
+        self.assertEqual(model.reclist, ['r%s' %i for i in [0, 1, 2, 4, 5, 6, 8, 9]])
+        model.deleteRows()
+        self.assertEqual(model.reclist, [])
+        self.assertEqual(len(model.data), 0)
+        self.assertEqual(len(model.rowheights), 0)
+
+
+class LongestEntryTests(unittest.TestCase):
+
+    def tableDict(self, values):
+        data = {'r%s' %i: {'c': v} for i, v in enumerate(values)}
+        data['columnnames'] = ['c']
+        data['columntypes'] = {'c': 'text'}
+        data['columnlabels'] = {'c': 'c'}
+        return data
+
+    def test_setup_forgets_widths(self):
+        model = TableModel(self.tableDict(['x'*40, 'y']))
+        self.assertEqual(model.getlongestEntry(0), 40)
+        model.setupModel(self.tableDict(['x', 'y'*7]))
+        self.assertEqual(model.getlongestEntry(0), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Recycling of canvas items between redraws.
+
+Provides CanvasItemPool, used by TableCanvas to keep the items of the visible
+cells alive across redraws. Drawing an item that already exists only sends the
+coordinates and options that changed to Tk, items that are no longer needed
+are hidden and handed out again for other keys instead of being deleted.
+"""
+
+
+class CanvasItemPool(object):
+    """
+    Keeps the canvas items of one type, e.g. the cell texts of a table, keyed
+    by what they show, e.g. (row, col). Callers should pass the same option
+    names on every draw of a pool, options left out keep their last value.
+    """
+
+    def __init__(self, canvas, itemtype):
+        """
+        Args:
+            canvas:     the tkinter Canvas the items are drawn on
+            itemtype:   canvas item type, e.g. 'text', 'rectangle' or 'line'
+        """
+        self.canvas = canvas
+        self.itemtype = itemtype
+        self.items = {}         # key -> canvas item id
+        self._state = {}        # key -> (coords, options) last sent to Tk
+        self._free = []         # hidden items that can be reused
+        self._drawn = None      # keys drawn since beginFrame
+        return
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def get(self, key):
+        """Return the item id for key or None"""
+        return self.items.get(key)
+
+    def draw(self, key, coords, **options):
+        """Show the item for key at coords with the given item options and
+           return its id. Only changed coordinates and options are applied."""
+
+        canvas = self.canvas
+        coords = tuple(coords)
+        item = self.items.get(key)
+        if item is None:
+            if len(self._free) > 0:
+                item = self._free.pop()
+                canvas.coords(item, *coords)
+                canvas.itemconfigure(item, state='normal', **options)
+            else:
+                item = getattr(canvas, 'create_'+self.itemtype)(*coords, **options)
+            self.items[key] = item
+        else:
+            oldcoords, oldoptions = self._state[key]
+            if oldcoords != coords:
+                canvas.coords(item, *coords)
+            if oldoptions != options:
+                changed = {k: v for k, v in options.items() if oldoptions.get(k) != v}
+                canvas.itemconfigure(item, **changed)
+        self._state[key] = (coords, options)
+        if self._drawn is not None:
+            self._drawn.add(key)
+        return item
+
+    def hide(self, key):
+        """Hide the item for key and keep it for reuse"""
+
+        item = self.items.pop(key, None)
+        if item is None:
+            return
+        del self._state[key]
+        self.canvas.itemconfigure(item, state='hidden', tags=())
+        self._free.append(item)
+        if self._drawn is not None:
+            self._drawn.discard(key)
+        return
+
+    def hideIf(self, test):
+        """Hide the items whose key passes test, e.g. cells out of view"""
+
+        for key in [k for k in self.items if test(k)]:
+            self.hide(key)
+        return
+
+    def keys(self):
+        """Return the keys of the shown items"""
+        return list(self.items.keys())
+
+    def beginFrame(self):
+        """Start a redraw, shown items not drawn again before endFrame is
+           called get hidden"""
+        self._drawn = set()
+        return
+
+    def inFrame(self):
+        """Return True between beginFrame and endFrame"""
+        return self._drawn is not None
+
+    def endFrame(self):
+        """Finish a redraw started with beginFrame"""
+
+        drawn = self._drawn
+        self._drawn = None
+        if drawn is None:
+            return
+        for key in [k for k in self.items if k not in drawn]:
+            self.hide(key)
+        return
+
+    def clear(self):
+        """Delete all items of the pool from the canvas"""
+
+        for item in list(self.items.values()) + self._free:
+            self.canvas.delete(item)
+        self.items = {}
+        self._state = {}
+        self._free = []
+        if self._drawn is not None:
+            self._drawn = set()
+        return
@@ -1,4 +1,5 @@
 import re
+from collections.abc import Mapping
 
 def contains(value, entry):
     return value in entry
@@ -75,72 +76,177 @@ operatornames = {'=': equals,
                 'before': beforeDateTime,
                 'since': sinceDateTime}
 
-def _filterBy(data, filtercol, value, op='contains', columndict=None, userecnames=False,
-                    progresscallback=None):
-    """The searching function that we apply to the model data.
-        This is used in Filtering.doFiltering to find the required recs
-        according to column, value and an operator"""
-
-    funcs = operatornames
-    floatops = ['=','>','<']
-    func = funcs[op]
+floatops = ['=','>','<']
+
+_MISSING = object()
+
+def __compileTextTest(value, op):
+    """Return a function str -> bool for an operator with its value bound,
+    lowered and compiled values are prepared once"""
+    if not isinstance(value, str):
+        func = operatornames[op]
+        return lambda item: func(value, item)
+    if op in ('contains (c.ins.)', 'starts with (c.ins.)', 'ends with (c.ins.)'):
+        lowered = value.lower()
+        if op == 'contains (c.ins.)':
+            return lambda item: lowered in item.lower()
+        if op == 'starts with (c.ins.)':
+            return lambda item: item.lower().startswith(lowered)
+        return lambda item: item.lower().endswith(lowered)
+    if op == 'regex':
+        search = re.compile(value).search
+        return lambda item: search(item) is not None
+    tests = {'=': lambda item: item == value,
+             '!=': lambda item: item != value,
+             '>': lambda item: item > value,
+             '<': lambda item: item < value,
+             'contains': lambda item: value in item,
+             'excludes': lambda item: value not in item,
+             'starts with': lambda item: item.startswith(value),
+             'ends with': lambda item: item.endswith(value),
+             'on': lambda item: item == value,
+             'before': lambda item: item < value,
+             'since': lambda item: item > value}
+    if op in tests:
+        return tests[op]
+    func = operatornames[op]
+    return lambda item: func(value, item)
+
+def compileFilter(filtercol, value, op='contains', columndict=None):
+    """Return a function row -> bool telling if a row dict passes one filter
+       term. Same as _filterBy for a single row, but the operator, the
+       numeric value, the lowered text or the regular expression are only
+       prepared once."""
+
+    if op not in operatornames:
+        raise KeyError(op)
     if columndict is not None:
         filtercolname = columndict[filtercol]
     else:
         filtercolname = filtercol
-    rowIds=[]
-    
-    if isinstance(data, dict):
-        keylist = data.keys()
+    texttest = __compileTextTest(value, op)
+    number = None
+    if op in floatops:
+        try:
+            number = float(value)
+        except (ValueError, TypeError):
+            pass
+
+    if number is None:
+        def passes(row):
+            item = row.get(filtercolname, _MISSING)
+            if item is _MISSING:
+                return False
+            return texttest(str(item))
+        return passes
+
+    numtest = {'=': lambda item: item == number,
+               '>': lambda item: item > number,
+               '<': lambda item: item < number}[op]
+    def passes(row):
+        item = row.get(filtercolname, _MISSING)
+        if item is _MISSING:
+            return False
+        #try to do float comparisons if required
+        try:
+            item = float(item)
+        except (ValueError, TypeError, OverflowError):
+            return texttest(str(item))
+        return numtest(item)
+    return passes
+
+def compileFilters(filters, columndict=None):
+    """Return a function row -> bool for a list of filter tuples of the form
+       (key,value,operator,bool). The terms are evaluated from left to right
+       as in doFiltering and only as far as needed, e.g. terms joined by AND
+       are not evaluated for a row that already failed."""
+
+    first = compileFilter(*filters[0][:3], columndict=columndict)
+    terms = []
+    for col, val, op, boolean in filters[1:]:
+        if boolean in ('AND', 'OR', 'NOT'):
+            terms.append((boolean, compileFilter(col, val, op, columndict)))
+    def passes(row):
+        result = first(row)
+        for boolean, test in terms:
+            if boolean == 'OR':
+                if not result:
+                    result = test(row)
+            elif result:
+                result = test(row) if boolean == 'AND' else not test(row)
+        return result
+    return passes
+
+def _iterRows(data):
+    """Return the (rowid, row) pairs of a dict or list of row dicts"""
+    if isinstance(data, Mapping):
+        return data.items()
     elif isinstance(data, list):
-        keylist = range(len(data))
+        return enumerate(data)
     else:
         raise RuntimeError("Unexpected data type.")
 
-    for rec in keylist:
-        if filtercolname in data[rec]:
-            #try to do float comparisons if required
-            if op in floatops:
-                try:
-                    #print float(data[rec][filtercolname])
-                    item = float(data[rec][filtercolname])
-                    v = float(value)
-                    if func(v, item) == True:
-                        rowIds.append(rec)
-                    continue
-                except:
-                    pass
-            item = str(data[rec][filtercolname])
-            if func(value, item):
-                rowIds.append(rec)
-    return rowIds
-
-def doFiltering(data, columndict=None, filters=None):
+def _filterBy(data, filtercol, value, op='contains', columndict=None, userecnames=False,
+                    progresscallback=None):
+    """The searching function that we apply to the model data.
+        This is used in Filtering.doFiltering to find the required recs
+        according to column, value and an operator"""
+
+    passes = compileFilter(filtercol, value, op, columndict)
+    return [rec for rec, row in _iterRows(data) if passes(row)]
+
+def _filterCandidates(filters, columndict, indexes):
+    """Return the boolean mask over the row positions of the rows that may
+       pass the filters according to the FilterIndexes, None if all rows
+       have to be tested"""
+
+    def candidates(col, val, op):
+        if columndict is not None:
+            col = columndict[col]
+        rows = indexes.candidates(col, op, val)
+        return None if rows is None else indexes.getMask(rows)
+
+    found = candidates(*filters[0][:3])
+    for col, val, op, boolean in filters[1:]:
+        if boolean == 'AND':
+            rows = candidates(col, val, op)
+            if rows is not None:
+                found = rows if found is None else found & rows
+        elif boolean == 'OR':
+            if found is not None:
+                rows = candidates(col, val, op)
+                found = None if rows is None else found | rows
+    return found
+
+def filterIndexed(data, columndict, filters, indexes):
+    """Return the found record keys in data order if the FilterIndexes
+       narrow down the rows to test, None if all rows have to be tested"""
+
+    if filters == None or len(filters) == 0:
+        return None
+    found = _filterCandidates(filters, columndict, indexes)
+    if found is None:
+        return None
+    passes = compileFilters(filters, columndict)
+    return [rec for rec in indexes.getRowIds(found) if passes(data[rec])]
+
+def doFiltering(data, columndict=None, filters=None, indexes=None, rows=None):
     """Module level method. Filter recs by several filters using a user provided
        search function.
        filters is a list of tuples of the form (key,value,operator,bool)
-       returns: found record keys or None to reset the filtering
+       indexes is an optional FilterIndexes of data, only the rows it
+       finds for the filters are tested
+       rows are optional record keys in data order, only these are tested
+       returns: found record keys in data order or None to reset the filtering
     """
 
     if filters == None or len(filters) == 0:
         return None
-    F = filters
-    sets = []
-    for f in F:
-        col, val, op, boolean = f
-        rowIds = _filterBy(data, col, val, op, columndict)
-        sets.append((set(rowIds), boolean))
-    rowIds = sets[0][0]
-    for s in sets[1:]:
-        b=s[1]
-        if b == 'AND':
-            rowIds = rowIds & s[0]
-        elif b == 'OR':
-            rowIds = rowIds | s[0]
-        elif b == 'NOT':
-            rowIds = rowIds - s[0]
-        #print len(names)
-    rowIds = list(rowIds)
-    return rowIds
-
-
+    if rows is None and indexes is not None:
+        found = filterIndexed(data, columndict, filters, indexes)
+        if found is not None:
+            return found
+    passes = compileFilters(filters, columndict)
+    if rows is not None:
+        return [rec for rec in rows if passes(data[rec])]
+    return [rec for rec, row in _iterRows(data) if passes(row)]
@@ -0,0 +1,141 @@
+"""
+Summary statistics of table columns.
+
+Provides ColumnStatistics, which keeps the count, null count, numeric-ness,
+minimum and maximum, longest entry and an approximate number of distinct
+values of one column. The statistics are updated as values are added to
+and removed from the column, so they can be read without scanning it.
+"""
+
+from bisect import bisect_left
+
+_HASHMASK = (1 << 64)-1
+
+
+class ColumnStatistics(object):
+    """
+    Statistics over the raw cell values of one column. Missing cells and
+    empty strings count as nulls. A value is numeric if it is a number or a
+    string that converts to a float. Dict values, i.e. formulas and links,
+    are counted separately as objects since their displayed value is not
+    known here.
+
+    Removing the current minimum, maximum or longest value marks that
+    statistic stale, stale statistics are recomputed by the owner with a
+    rescan. The distinct count is a k minimum values estimate, exact below
+    k distinct values, and is not reduced by removals.
+    """
+
+    def __init__(self, k=256):
+        self.k = k
+        self.count = 0          # cells, including nulls
+        self.nulls = 0
+        self.numbers = 0        # numeric values
+        self.strings = 0        # non numeric, non null values
+        self.objects = 0        # dict values
+        self.minimum = None     # of the numeric values
+        self.maximum = None
+        self.maxlength = 0      # longest str() of the non null values
+        self.stale = False      # minimum, maximum or maxlength must be recomputed
+        self._sketch = []       # k smallest value hashes, sorted
+        return
+
+    def __repr__(self):
+        return ('ColumnStatistics(count=%s, nulls=%s, numeric=%s, min=%s, max=%s, maxlength=%s, distinct~%s)'
+                %(self.count, self.nulls, self.isNumeric(), self.minimum, self.maximum,
+                  self.maxlength, self.distinctCount()))
+
+    @staticmethod
+    def toNumber(value):
+        """Return value as a float or None if it is not numeric"""
+
+        if type(value) is bool:
+            return None
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                return None
+        return None
+
+    def add(self, value):
+        """Take a value added to the column into account"""
+
+        self.count += 1
+        if value is None or value == '':
+            self.nulls += 1
+            return
+        if type(value) is dict:
+            self.objects += 1
+            return
+        number = self.toNumber(value)
+        if number is None:
+            self.strings += 1
+        else:
+            self.numbers += 1
+            if self.minimum is None or number < self.minimum:
+                self.minimum = number
+            if self.maximum is None or number > self.maximum:
+                self.maximum = number
+        length = len(str(value))
+        if length > self.maxlength:
+            self.maxlength = length
+        self._addHash(value)
+        return
+
+    def remove(self, value):
+        """Take a value removed from the column into account"""
+
+        self.count -= 1
+        if value is None or value == '':
+            self.nulls -= 1
+            return
+        if type(value) is dict:
+            self.objects -= 1
+            return
+        number = self.toNumber(value)
+        if number is None:
+            self.strings -= 1
+        else:
+            self.numbers -= 1
+            if number == self.minimum or number == self.maximum:
+                self.stale = True
+        if len(str(value)) == self.maxlength:
+            self.stale = True
+        return
+
+    def replace(self, old, new):
+        """Take a changed cell value into account"""
+        self.remove(old)
+        self.add(new)
+        return
+
+    def _addHash(self, value):
+        try:
+            h = hash((value, 'kmv')) & _HASHMASK
+        except TypeError:
+            return
+        sketch = self._sketch
+        if len(sketch) >= self.k and h >= sketch[-1]:
+            return
+        i = bisect_left(sketch, h)
+        if i < len(sketch) and sketch[i] == h:
+            return
+        sketch.insert(i, h)
+        if len(sketch) > self.k:
+            sketch.pop()
+        return
+
+    def isNumeric(self):
+        """True if all non null values are numbers"""
+        return self.numbers > 0 and self.strings == 0 and self.objects == 0
+
+    def distinctCount(self):
+        """Approximate number of distinct non null values"""
+
+        sketch = self._sketch
+        if len(sketch) < self.k:
+            return len(sketch)
+        return int((self.k-1)/((sketch[-1]+1)/float(1 << 64)))
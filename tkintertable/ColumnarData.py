@@ -0,0 +1,192 @@
+"""
+Column oriented storage for table data.
+
+Provides ColumnarData, a mapping of record names to records that can be used
+in place of the dict of row dicts held by TableModel.data. The cell values
+are kept in one list per column plus an index from record name to slot, so
+a record costs one list entry per column instead of a dict of its own.
+"""
+import copy
+from collections.abc import MutableMapping
+
+
+class _Missing(object):
+    """Marker for a cell that holds no value"""
+    def __repr__(self):
+        return '<missing>'
+
+    def __reduce__(self):
+        return '_MISSING'
+
+_MISSING = _Missing()
+
+
+class ColumnarRecord(MutableMapping):
+    """
+    View on a single record of a ColumnarData store. Behaves like the row dict
+    of a plain TableModel, reads and writes go straight to the column lists.
+    """
+    __slots__ = ('_store', '_slot')
+
+    def __init__(self, store, slot):
+        self._store = store
+        self._slot = slot
+
+    def __getitem__(self, colname):
+        column = self._store._columns.get(colname)
+        if column is None:
+            raise KeyError(colname)
+        value = column[self._slot]
+        if value is _MISSING:
+            raise KeyError(colname)
+        return value
+
+    def __setitem__(self, colname, value):
+        self._store._setCell(self._slot, colname, value)
+
+    def __delitem__(self, colname):
+        column = self._store._columns.get(colname)
+        if column is None or column[self._slot] is _MISSING:
+            raise KeyError(colname)
+        column[self._slot] = _MISSING
+
+    def __contains__(self, colname):
+        column = self._store._columns.get(colname)
+        return column is not None and column[self._slot] is not _MISSING
+
+    def __iter__(self):
+        slot = self._slot
+        for colname, column in self._store._columns.items():
+            if column[slot] is not _MISSING:
+                yield colname
+
+    def __len__(self):
+        slot = self._slot
+        return sum(1 for column in self._store._columns.values() if column[slot] is not _MISSING)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ColumnarData(MutableMapping):
+    """
+    Mapping of record name to record that stores the cell values column by
+    column. Records are returned as ColumnarRecord views, so code written for
+    the dict of dicts layout, e.g. data[recname][colname], keeps working.
+    """
+
+    def __init__(self, data=None):
+        self._columns = {}      # column name -> list of cell values, one per slot
+        self._slots = {}        # record name -> slot in the column lists
+        self._freeslots = []    # slots of deleted records, reused on insert
+        self._nslots = 0
+        if data is not None:
+            self.update(data)
+        return
+
+    def __getitem__(self, recname):
+        return ColumnarRecord(self, self._slots[recname])
+
+    def __setitem__(self, recname, record):
+        slot = self._slots.get(recname)
+        if slot is None:
+            slot = self._allocateSlot(recname)
+        else:
+            self._clearSlot(slot)
+        for colname in record:
+            self._setCell(slot, colname, record[colname])
+        return
+
+    def __delitem__(self, recname):
+        slot = self._slots.pop(recname)
+        self._clearSlot(slot)
+        self._freeslots.append(slot)
+        return
+
+    def __contains__(self, recname):
+        return recname in self._slots
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __deepcopy__(self, memo):
+        return ColumnarData(copy.deepcopy(self.toDict(), memo))
+
+    def __repr__(self):
+        return 'ColumnarData with %s records and %s columns' %(len(self._slots), len(self._columns))
+
+    def clear(self):
+        """Remove all records"""
+        for colname in self._columns:
+            self._columns[colname] = []
+        self._slots = {}
+        self._freeslots = []
+        self._nslots = 0
+        return
+
+    def _allocateSlot(self, recname):
+        if len(self._freeslots) > 0:
+            slot = self._freeslots.pop()
+        else:
+            slot = self._nslots
+            self._nslots += 1
+            for column in self._columns.values():
+                column.append(_MISSING)
+        self._slots[recname] = slot
+        return slot
+
+    def _clearSlot(self, slot):
+        for column in self._columns.values():
+            column[slot] = _MISSING
+        return
+
+    def _setCell(self, slot, colname, value):
+        column = self._columns.get(colname)
+        if column is None:
+            column = [_MISSING]*self._nslots
+            self._columns[colname] = column
+        column[slot] = value
+        return
+
+    def getColumnNames(self):
+        """Return the names of the stored columns"""
+        return list(self._columns.keys())
+
+    def getColumnValues(self, colname, recnames=None, default=''):
+        """
+        Return the values of one column for the given records.
+        Args:
+            colname:    the column to read
+            recnames:   record names in the required order, all records if None
+            default:    value returned for records without a value in the column
+        """
+        if recnames is None:
+            recnames = self._slots.keys()
+        column = self._columns.get(colname)
+        if column is None:
+            return [default]*len(recnames)
+        slots = self._slots
+        values = [column[slots[n]] for n in recnames]
+        return [default if v is _MISSING else v for v in values]
+
+    def dropColumn(self, colname):
+        """Remove a column and its values from every record"""
+        self._columns.pop(colname, None)
+        return
+
+    def renameRecord(self, oldname, newname):
+        """Give a record a new name without moving its values"""
+        if newname in self._slots:
+            raise KeyError('record %s already exists' %newname)
+        self._slots[newname] = self._slots.pop(oldname)
+        return
+
+    def toDict(self):
+        """Return the data as a plain dict of row dicts"""
+        return {name: dict(ColumnarRecord(self, slot)) for name, slot in self._slots.items()}
@@ -24,4 +24,6 @@ class FilterDialogFactoryInterface(ABC):
             doFilter: function handle that is called when the filtering is triggered. It itself provides a function handle that must be called to get the filter result.
                     Args:   Callback function: Callable[[str, str, str], list[str]]. For more details see description in Filtering.TableFilter.doFiltering
                     Return: None
+                    The callback function is called with the keyword arguments filterfunction and dataversion
+                    of Filtering.TableFilter.doFiltering, a function wrapping it has to pass them on.
         """
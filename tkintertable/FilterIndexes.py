@@ -0,0 +1,339 @@
+"""
+Indexes that narrow down the rows a filter term has to be tested on.
+
+Provides TrigramIndex, which finds the rows whose text may contain a given
+substring from the three character sequences of the cell texts,
+SortedIndex, which finds the rows whose value is equal to, above or below a
+given one by binary search in the sorted values, and FilterIndexes, which
+holds the indexes of the columns of a table. An index
+only returns candidate rows, the filter terms are still tested on these, so
+a filter gives the same rows with or without indexes.
+"""
+
+from collections.abc import Mapping
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+import numpy as np
+
+_MISSING = object()
+
+
+class TrigramIndex(object):
+    """
+    Row ids by the trigrams of the text of their cell in one column. The
+    text is casefolded, so the index serves the case sensitive and the case
+    insensitive operators. Substrings shorter than three characters can not
+    be looked up.
+    """
+    operators = ('contains', 'contains (c.ins.)', 'starts with', 'ends with',
+                 'starts with (c.ins.)', 'ends with (c.ins.)')
+
+    def __init__(self):
+        self.postings = {}      # trigram -> set of row ids
+        return
+
+    def __repr__(self):
+        return 'TrigramIndex(%s trigrams)' %len(self.postings)
+
+    @staticmethod
+    def trigrams(text):
+        """Return the set of trigrams of a text"""
+        text = text.casefold()
+        return {text[i:i+3] for i in range(len(text)-2)}
+
+    def add(self, rowid, value):
+        """Index the value of a row"""
+        if value is _MISSING:
+            return
+        postings = self.postings
+        for g in self.trigrams(str(value)):
+            rows = postings.get(g)
+            if rows is None:
+                postings[g] = {rowid}
+            else:
+                rows.add(rowid)
+        return
+
+    def remove(self, rowid, value):
+        """Remove the indexed value of a row"""
+        if value is _MISSING:
+            return
+        postings = self.postings
+        for g in self.trigrams(str(value)):
+            rows = postings.get(g)
+            if rows is not None:
+                rows.discard(rowid)
+                if len(rows) == 0:
+                    del postings[g]
+        return
+
+    def candidates(self, op, value):
+        """Return the set of row ids that may pass the filter term, None if
+           the index can not narrow them down"""
+        if op not in self.operators or not isinstance(value, str):
+            return None
+        grams = self.trigrams(value)
+        if len(grams) == 0:
+            return None
+        postings = self.postings
+        sets = sorted((postings.get(g, ()) for g in grams), key=len)
+        result = set(sets[0])
+        for rows in sets[1:]:
+            if len(result) == 0:
+                break
+            result &= rows
+        return result
+
+
+class SortedIndex(object):
+    """
+    Row ids sorted by the value of their cell in one column, once by the
+    str of the value and once by the float of it for the values that are
+    numbers. The comparison operators compare numbers if both the filter
+    value and the cell are numbers and the texts otherwise, the date
+    operators always compare the texts, see CellContentOperators.
+    """
+    operators = ('=', '>', '<', 'on', 'before', 'since')
+
+    def __init__(self):
+        self.texts = []         # sorted str of the values
+        self.textrows = []      # row id of each entry of texts
+        self.numbers = []       # sorted float of the values that are numbers
+        self.numberrows = []    # row id of each entry of numbers
+        self.nonnumbers = set() # row ids of the values that are no numbers
+        return
+
+    def __repr__(self):
+        return 'SortedIndex(%s values, %s numbers)' %(len(self.texts), len(self.numbers))
+
+    @staticmethod
+    def toNumber(value):
+        """Return the float of a value as the filter operators get it, None
+           if it is no number. NaN is not indexed, it passes no comparison"""
+        try:
+            return float(value)
+        except (ValueError, TypeError, OverflowError):
+            return None
+
+    def build(self, rows):
+        """Index the (row id, value) pairs of all rows at once"""
+        texts = []
+        numbers = []
+        nonnumbers = set()
+        for rowid, value in rows:
+            if value is _MISSING:
+                continue
+            texts.append((str(value), rowid))
+            number = self.toNumber(value)
+            if number is None:
+                nonnumbers.add(rowid)
+            elif number == number:
+                numbers.append((number, rowid))
+        texts.sort(key=itemgetter(0))
+        numbers.sort(key=itemgetter(0))
+        self.texts = [t for t, _ in texts]
+        self.textrows = [r for _, r in texts]
+        self.numbers = [n for n, _ in numbers]
+        self.numberrows = [r for _, r in numbers]
+        self.nonnumbers = nonnumbers
+        return
+
+    @staticmethod
+    def _insert(keys, rows, key, rowid):
+        i = bisect_right(keys, key)
+        keys.insert(i, key)
+        rows.insert(i, rowid)
+        return
+
+    @staticmethod
+    def _delete(keys, rows, key, rowid):
+        i = bisect_left(keys, key)
+        j = bisect_right(keys, key)
+        for k in range(i, j):
+            if rows[k] == rowid:
+                del keys[k]
+                del rows[k]
+                return
+        return
+
+    def add(self, rowid, value):
+        """Index the value of a row"""
+        if value is _MISSING:
+            return
+        self._insert(self.texts, self.textrows, str(value), rowid)
+        number = self.toNumber(value)
+        if number is None:
+            self.nonnumbers.add(rowid)
+        elif number == number:
+            self._insert(self.numbers, self.numberrows, number, rowid)
+        return
+
+    def remove(self, rowid, value):
+        """Remove the indexed value of a row"""
+        if value is _MISSING:
+            return
+        self._delete(self.texts, self.textrows, str(value), rowid)
+        number = self.toNumber(value)
+        if number is None:
+            self.nonnumbers.discard(rowid)
+        elif number == number:
+            self._delete(self.numbers, self.numberrows, number, rowid)
+        return
+
+    @staticmethod
+    def _range(keys, rows, op, key):
+        if op in ('=', 'on'):
+            return rows[bisect_left(keys, key):bisect_right(keys, key)]
+        if op in ('>', 'since'):
+            return rows[bisect_right(keys, key):]
+        return rows[:bisect_left(keys, key)]
+
+    def candidates(self, op, value):
+        """Return the set of row ids that may pass the filter term, None if
+           the index can not narrow them down"""
+        if op not in self.operators:
+            return None
+        if op in ('=', '>', '<'):
+            number = self.toNumber(value)
+            if number is not None:
+                if number == number:
+                    found = set(self._range(self.numbers, self.numberrows, op, number))
+                else:
+                    found = set()
+                # cells that are no numbers are compared as text
+                if len(self.nonnumbers) > 0 and isinstance(value, str):
+                    nonnumbers = self.nonnumbers
+                    found.update(r for r in self._range(self.texts, self.textrows, op, value)
+                                 if r in nonnumbers)
+                elif len(self.nonnumbers) > 0:
+                    return None
+                return found
+        if not isinstance(value, str):
+            return None
+        return set(self._range(self.texts, self.textrows, op, value))
+
+
+class FilterIndexes(object):
+    """
+    The filter indexes of the columns of a list or dict of row dicts. An
+    index is built when a filter term first asks for it, the owner of the
+    data keeps the built indexes up to date with add, remove and replace.
+    Sets of row ids are turned into boolean masks over the row positions
+    with getMask, so the terms of a filter can be combined with array
+    operations, and back into row ids in data order with getRowIds.
+    """
+    MISSING = _MISSING      # value of a cell that is not set
+
+    def __init__(self, data, kinds=(TrigramIndex, SortedIndex)):
+        """
+        Args:
+            data:   list of row dicts or dict of row name -> row dict
+            kinds:  the index classes to use
+        """
+        self.data = data
+        self.kinds = kinds
+        self.indexes = {}       # (index class, column name) -> index
+        self._serial = None     # row id -> position, for dict data
+        self._rowids = None     # position -> row id, None for removed rows
+        return
+
+    def __repr__(self):
+        return 'FilterIndexes(%s)' %', '.join('%s: %s' %(c, i) for (_, c), i in self.indexes.items())
+
+    def _rows(self):
+        if isinstance(self.data, Mapping):
+            return self.data.items()
+        return enumerate(self.data)
+
+    def getIndex(self, kind, colname):
+        """Return the index of a column, it is built if needed"""
+        index = self.indexes.get((kind, colname))
+        if index is None:
+            index = kind()
+            rows = ((rowid, row.get(colname, _MISSING)) for rowid, row in self._rows())
+            if hasattr(index, 'build'):
+                index.build(rows)
+            else:
+                for rowid, value in rows:
+                    index.add(rowid, value)
+            self.indexes[(kind, colname)] = index
+        return index
+
+    def candidates(self, colname, op, value):
+        """Return the set of row ids that may pass a filter term, None if
+           there is no index for the operator"""
+        for kind in self.kinds:
+            if op in kind.operators:
+                return self.getIndex(kind, colname).candidates(op, value)
+        return None
+
+    def _setupPositions(self):
+        if self._serial is None:
+            self._rowids = list(self.data)
+            self._serial = {rowid: i for i, rowid in enumerate(self._rowids)}
+        return
+
+    def size(self):
+        """Return the number of row positions, the length of the masks"""
+        if not isinstance(self.data, Mapping):
+            return len(self.data)
+        self._setupPositions()
+        return len(self._rowids)
+
+    def getMask(self, rowids):
+        """Return the boolean mask of the positions of the given row ids"""
+        mask = np.zeros(self.size(), dtype=bool)
+        if not isinstance(self.data, Mapping):
+            positions = np.fromiter(rowids, dtype=np.intp, count=len(rowids))
+        else:
+            serial = self._serial
+            positions = np.fromiter((serial[r] for r in rowids), dtype=np.intp, count=len(rowids))
+        mask[positions] = True
+        return mask
+
+    def getRowIds(self, mask):
+        """Return the row ids at the set positions of a mask in data order"""
+        positions = np.flatnonzero(mask).tolist()
+        if not isinstance(self.data, Mapping):
+            return positions
+        rowids = self._rowids
+        return [rowids[i] for i in positions]
+
+    def add(self, rowid, row):
+        """Take a row added to the data into account"""
+        for (_, colname), index in self.indexes.items():
+            index.add(rowid, row.get(colname, _MISSING))
+        if self._serial is not None:
+            self._serial[rowid] = len(self._rowids)
+            self._rowids.append(rowid)
+        return
+
+    def remove(self, rowid, row):
+        """Take a row removed from the data into account"""
+        for (_, colname), index in self.indexes.items():
+            index.remove(rowid, row.get(colname, _MISSING))
+        if self._serial is not None and rowid in self._serial:
+            self._rowids[self._serial.pop(rowid)] = None
+        return
+
+    def replace(self, rowid, colname, old=_MISSING, new=_MISSING):
+        """Take a changed cell into account, old or new are MISSING if the
+           cell had or has no value"""
+        for (_, col), index in self.indexes.items():
+            if col == colname:
+                index.remove(rowid, old)
+                index.add(rowid, new)
+        return
+
+    def dropColumn(self, colname):
+        """Forget the indexes of a column"""
+        for key in [k for k in self.indexes if k[1] == colname]:
+            del self.indexes[key]
+        return
+
+    def clear(self):
+        """Forget all indexes, e.g. after the data was replaced"""
+        self.indexes = {}
+        self._serial = None
+        self._rowids = None
+        return
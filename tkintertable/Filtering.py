@@ -5,12 +5,97 @@ to perform a filtering.
 """
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 
 # provide when this module is imported:
 from .CellContentOperators import doFiltering
 
+
+def _narrowsTerm(old, new):
+    """True if every row passing the filter term new passes old"""
+    col, val, op, _ = old
+    newcol, newval, newop, _ = new
+    if col != newcol or op != newop:
+        return False
+    if val == newval:
+        return True
+    if not isinstance(val, str) or not isinstance(newval, str):
+        return False
+    if op == 'contains':
+        return val in newval
+    if op == 'starts with':
+        return newval.startswith(val)
+    if op == 'ends with':
+        return newval.endswith(val)
+    if op == 'contains (c.ins.)':
+        return val.lower() in newval.lower()
+    if op == 'starts with (c.ins.)':
+        return newval.lower().startswith(val.lower())
+    if op == 'ends with (c.ins.)':
+        return newval.lower().endswith(val.lower())
+    return False
+
+def isRefinement(old, new):
+    """
+    True if the rows passing the filters new are a subset of the rows
+    passing the filters old, e.g. when a character was added to a contains
+    term or a term joined by AND was added. Only the terms whose narrowing
+    narrows the result are compared, terms joined by NOT must be equal.
+    """
+    if len(old) == 0 or len(new) < len(old):
+        return False
+    for i, (o, n) in enumerate(zip(old, new)):
+        if i > 0 and o[3] != n[3]:
+            return False
+        if o == n:
+            continue
+        if i > 0 and n[3] not in ('AND', 'OR'):
+            return False
+        if not _narrowsTerm(o, n):
+            return False
+    # terms joined by OR could add rows
+    return all(n[3] != 'OR' for n in new[len(old):])
+
+
+class FilterCache(object):
+    """
+    Results of recent filterings of one data set, the least recently used
+    ones are dropped. Holds the data, its version and the column dict they
+    were found for.
+    """
+
+    def __init__(self, data, dataversion, columndict, size=16):
+        self.data = data
+        self.dataversion = dataversion
+        self.columndict = columndict
+        self.size = size
+        self.results = OrderedDict()    # filter structure -> row ids, most recent last
+        self.last = None                # filter structure of the last filtering
+        return
+
+    def matches(self, data, dataversion, columndict):
+        """True if the kept results are valid for the given data"""
+        return data is self.data and dataversion == self.dataversion and \
+               columndict == self.columndict
+
+    def get(self, filters):
+        rowids = self.results.get(filters)
+        if rowids is not None:
+            self.results.move_to_end(filters)
+        return rowids
+
+    def put(self, filters, rowids):
+        self.results[filters] = rowids
+        self.results.move_to_end(filters)
+        while len(self.results) > self.size:
+            self.results.popitem(last=False)
+        self.last = filters
+        return
+
+
 class TableFilter(ABC):
     """Abstract class that provides filter functionality for Table objects"""
+    filtercachesize = 16    # number of filter results kept, see doFiltering
 
     @abstractmethod
     def updateResults(self, rownames: list[str]) -> None:
@@ -24,16 +109,52 @@ class TableFilter(ABC):
     def getFilterStructure(self) -> list[(str, str, str, bool)]:
         """Return the structure containing information on  the filters applied to the table."""
 
-    def doFiltering(self, data, columnDict=None) -> list[str]:
+    def doFiltering(self, data, columnDict=None, filterfunction=None, dataversion=None) -> list[str]:
         """
         ...
+        The tables call the filter callback with the keyword arguments
+        filterfunction and dataversion, an overriding method has to accept
+        them.
         Args:
             ...
+            filterfunction: function used instead of doFiltering, called
+                            with the same arguments and rows
+            dataversion:    changes whenever data changes. If given, recent
+                            results are reused and a filter that narrows
+                            the last one only tests the rows found by it
         Return returns a list of row IDs, can be None if no filter is applied
         """
+        if filterfunction is None:
+            filterfunction = doFiltering
         filter_structure = self.getFilterStructure()
-        row_ids = doFiltering(data, columnDict, filter_structure)
+        if dataversion is None or len(filter_structure) == 0:
+            row_ids = filterfunction(data, columnDict, filter_structure)
+        else:
+            row_ids = self._doCachedFiltering(data, columnDict, filterfunction,
+                                              filter_structure, dataversion)
         if row_ids is None:
             self.updateResults(list(range(len(data))))
         return row_ids
+
+    def _doCachedFiltering(self, data, columnDict, filterfunction, filter_structure, dataversion):
+        try:
+            key = tuple(tuple(f) for f in filter_structure)
+            hash(key)
+        except TypeError:
+            return filterfunction(data, columnDict, filter_structure)
+        cache = getattr(self, '_filtercache', None)
+        if cache is None or not cache.matches(data, dataversion, columnDict):
+            cache = FilterCache(data, dataversion, columnDict, self.filtercachesize)
+            self._filtercache = cache
+        row_ids = cache.get(key)
+        if row_ids is None:
+            rows = None
+            if cache.last is not None and isRefinement(cache.last, key):
+                rows = cache.results.get(cache.last)
+            row_ids = filterfunction(data, columnDict, filter_structure, rows=rows)
+            cache.put(key, row_ids)
+        else:
+            cache.last = key
+        # the caller may keep and change the list
+        return list(row_ids)
     
\ No newline at end of file
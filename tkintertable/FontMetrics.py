@@ -0,0 +1,204 @@
+"""
+Shared character width tables for measuring cell text.
+
+Provides FontMetrics, the advance widths of the characters of one font, and
+getFontMetrics, which returns the instance for a font from a process wide
+cache so that all tables using the same font share one table. Widths are
+measured lazily with tkinter.font.Font.measure and can optionally be stored
+in a file next to the preferences file, so later sessions need not measure
+them again.
+"""
+
+from __future__ import absolute_import, division, print_function
+import os, pickle
+import numpy as np
+try:
+    from tkinter import font
+except:
+    import tkFont as font
+
+METRICS_FILE = '.Table_fontmetrics'
+
+_metrics = {}       # font key -> FontMetrics
+_loaded = set()     # directories whose metrics file has been read
+
+
+class FontMetrics(object):
+    """
+    Advance widths in pixels of the characters of a font. Indexing by a
+    character returns its width, characters not seen before are measured on
+    first use.
+    """
+
+    def __init__(self, tkfont, key, widths=None):
+        """
+        Args:
+            tkfont:     tkinter.font.Font used to measure new characters
+            key:        (family, size, weight, slant, scaling) of the font
+            widths:     widths of already measured characters
+        """
+        self.tkfont = tkfont
+        self.key = key
+        self.widths = dict(widths) if widths else {}
+        self.changed = False
+        self.codewidths = np.full(128, -1.0)    # widths by code point, -1 if not measured
+        return
+
+    def __getitem__(self, char):
+        w = self.widths.get(char)
+        if w is None:
+            w = self.tkfont.measure(char)
+            self.widths[char] = w
+            self.changed = True
+        return w
+
+    def __repr__(self):
+        return 'FontMetrics(%s, %s characters)' %(self.key, len(self.widths))
+
+    def measureText(self, text):
+        """Return the width of a string"""
+        return sum(self[c] for c in text)
+
+    def cumulativeWidths(self, text):
+        """Return the width of each prefix of a string"""
+        return np.cumsum([self[c] for c in text])
+
+    def truncate(self, text, width, ellipsis='...'):
+        """Return text, or the longest start of it followed by ellipsis
+           that fits within width"""
+
+        widths = self.cumulativeWidths(text)
+        if len(widths) == 0 or widths[-1] <= width:
+            return text
+        idx = int(np.searchsorted(widths, width-self.measureText(ellipsis), side='left'))
+        return text[:idx]+ellipsis
+
+    def codePointWidths(self, codes):
+        """Return the widths for an array of code points"""
+
+        table = self.codewidths
+        top = int(codes.max())
+        if top >= len(table):
+            table = np.concatenate([table, np.full(top+1-len(table), -1.0)])
+            self.codewidths = table
+        widths = table[codes]
+        if (widths < 0).any():
+            for c in np.unique(codes[widths < 0]).tolist():
+                table[c] = self[chr(c)]
+            widths = table[codes]
+        return widths
+
+    def truncateMany(self, texts, width, ellipsis='...'):
+        """Same as truncate for a list of strings sharing one width, e.g.
+           the visible cells of a column, done in one vectorized pass"""
+
+        if len(texts) == 0:
+            return []
+        joined = ''.join(texts)
+        if len(joined) == 0:
+            return list(texts)
+        try:
+            codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+        except UnicodeEncodeError:
+            return [self.truncate(t, width, ellipsis) for t in texts]
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        ends = np.cumsum(lengths)
+        starts = ends-lengths
+        #running width over all strings, 0 prepended so that cum[i] is the width before char i
+        cum = np.concatenate([[0.0], np.cumsum(self.codePointWidths(codes))])
+        totals = cum[ends]-cum[starts]
+        over = np.nonzero(totals > width)[0]
+        result = list(texts)
+        if len(over) == 0:
+            return result
+        #chars of each string whose running width is below the limit, as in truncate
+        limit = width-self.measureText(ellipsis)
+        charends = np.repeat(cum[starts], lengths)
+        fits = (cum[1:]-charends) < limit
+        fitcum = np.concatenate([[0], np.cumsum(fits)])
+        counts = fitcum[ends]-fitcum[starts]
+        for i in over.tolist():
+            result[i] = texts[i][:int(counts[i])]+ellipsis
+        return result
+
+
+def fontKey(tkfont, scaling):
+    """Return the (family, size, weight, slant, scaling) of a tkinter Font,
+       the widths of a font in points depend on the Tk scaling"""
+
+    actual = tkfont.actual()
+    return (actual['family'], actual['size'], actual['weight'], actual['slant'], scaling)
+
+
+def getFontMetrics(widget, fontdesc, cachedir=None):
+    """
+    Return the shared FontMetrics for a font.
+    Args:
+        widget:     any tkinter widget, used to create the Font
+        fontdesc:   font description, e.g. ('Arial', 12) or 'Arial 12 bold'
+        cachedir:   directory of the metrics file, no file is used if None
+                    (the default)
+    """
+
+    if cachedir is not None and cachedir not in _loaded:
+        _loaded.add(cachedir)
+        loadFontMetrics(cachedir)
+    tkfont = font.Font(root=widget, font=fontdesc)
+    key = fontKey(tkfont, float(widget.tk.call('tk', 'scaling')))
+    metrics = _metrics.get(key)
+    if metrics is None:
+        metrics = FontMetrics(tkfont, key)
+        _metrics[key] = metrics
+    else:
+        #measure with the font of this widget, the Tk root that created
+        #the previous one may have been destroyed
+        metrics.tkfont = tkfont
+    if len(metrics.widths) == 0:
+        #printable ascii covers most cells, measure once and keep
+        for i in range(32, 127):
+            metrics[chr(i)]
+        if cachedir is not None:
+            saveFontMetrics(cachedir)
+    return metrics
+
+
+def loadFontMetrics(cachedir):
+    """Read stored character widths from the metrics file in cachedir"""
+
+    filename = os.path.join(cachedir, METRICS_FILE)
+    if not os.path.isfile(filename):
+        return
+    try:
+        with open(filename, 'rb') as fd:
+            stored = pickle.load(fd)
+    except Exception as e:
+        print (e)
+        return
+    for key, widths in stored.items():
+        if len(key) != 5:
+            continue # stored without the scaling
+        metrics = _metrics.get(key)
+        if metrics is None:
+            _metrics[key] = FontMetrics(None, key, widths)
+        else:
+            for char, w in widths.items():
+                metrics.widths.setdefault(char, w)
+    return
+
+
+def saveFontMetrics(cachedir):
+    """Write the measured character widths to the metrics file in cachedir"""
+
+    if not any(m.changed for m in _metrics.values()):
+        return
+    filename = os.path.join(cachedir, METRICS_FILE)
+    stored = {key: m.widths for key, m in _metrics.items()}
+    try:
+        with open(filename, 'wb') as fd:
+            pickle.dump(stored, fd, protocol=2)
+    except Exception:
+        print ('could not save font metrics')
+        return
+    for m in _metrics.values():
+        m.changed = False
+    return
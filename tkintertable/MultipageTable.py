@@ -3,13 +3,45 @@ Provide functionality for a table that spans multiple pages accessible via butto
 """
 import tkinter as tk
 from tkinter import Frame
-from operator import itemgetter
+import threading
+import logging
+import numpy as np
 from typing import Union, Callable
 
-from .CellContentOperators import doFiltering
+from .CellContentOperators import doFiltering, filterIndexed
+from .VectorizedFiltering import FilterFrame
+from .FilterIndexes import FilterIndexes
+from .ParallelFiltering import ParallelFilter
 from .Tables import TableCanvas
 from .NavigationPanel import NavigationPanel
-from .MultipageData import parse_data
+from .MultipageData import parse_data, UserInterruptException
+from .Sorting import TableSorter, getSortPermutation, getSortedHead
+
+logger = logging.getLogger(__name__)
+
+class RowView(object):
+    """
+    Read only sequence of the rows of data at the given row indices, e.g. the
+    sorted or filtered rows of a MultipageTable. The rows are not copied.
+    """
+    def __init__(self, data, ids):
+        self.data = data
+        self.ids = ids
+        return
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            data = self.data
+            return [data[j] for j in self.ids[i].tolist()]
+        return self.data[int(self.ids[i])]
+
+    def __iter__(self):
+        data = self.data
+        return (data[j] for j in self.ids.tolist())
+
 
 class MultipageTable(Frame):
     """
@@ -26,6 +58,29 @@ class MultipageTable(Frame):
                                 indicated by a number between 0 and 1.
         dataconstructors:
         filterdialogfactory:
+        sortProgressCallback:   function called on the Tk thread while the
+                                data is sorted in the background. Input is
+                                the progress indicated by a number between
+                                0 and 1.
+        sortErrorCallback:      function called on the Tk thread with the
+                                exception if the background sorting fails,
+                                the rows keep their previous order. The
+                                error is logged in any case.
+        vectorizedFiltering:    filter with column-wise operations on
+                                column arrays built on the first filtering
+        filterIndexes:          narrow down the rows tested by the filters
+                                with trigram and sorted indexes of the
+                                columns, built on the first filtering.
+                                Filters the indexes narrow down are tested
+                                on the found rows only, the others are
+                                left to the parallel or vectorized filtering
+        parallelFiltering:      filter on a pool of worker processes, True
+                                for one per CPU or the number of processes
+        filterProgressCallback: function called while filtering on worker
+                                processes. Input is the progress indicated
+                                by a number between 0 and 1. The filtering
+                                blocks the Tk thread until it is done, so
+                                it can not be cancelled.
     """
     def __init__(self,
                  parent: tk.Tk,
@@ -36,7 +91,13 @@ class MultipageTable(Frame):
                  fieldtypes=None,
                  dataParserCallback: Union[Callable[float, None], None]=None,
                  dataconstructors: Union[dict, None]=None,
-                 filterdialogfactory:Union[Callable, None]=None
+                 filterdialogfactory:Union[Callable, None]=None,
+                 sortProgressCallback: Union[Callable[float, None], None]=None,
+                 sortErrorCallback: Union[Callable[Exception, None], None]=None,
+                 vectorizedFiltering: bool=False,
+                 filterIndexes: bool=False,
+                 parallelFiltering: Union[bool, int]=False,
+                 filterProgressCallback: Union[Callable[float, None], None]=None
                  ):
         """
         Table that displays its rows on multiple pages. Navigation is possible using buttons at the bottom.
@@ -62,9 +123,26 @@ class MultipageTable(Frame):
             dataconstructors=dataconstructors,
             progresscallback=dataParserCallback,
             )
-        self._filteredData = None
+        # the data is never reordered, the shown rows are a view on it
+        self._sortorder = None      # row indices in sorted order
+        self._filterids = None      # indices of the rows passing the filter
+        self._view = None           # RowView of the shown rows, None if all in data order
+        self._filterframe = FilterFrame(self._data) if vectorizedFiltering else None
+        self._filterindexes = FilterIndexes(self._data) if filterIndexes else None
+        self._parallelfilter = None
+        if parallelFiltering:
+            processes = None if parallelFiltering is True else int(parallelFiltering)
+            self._parallelfilter = ParallelFilter(self._data, processes)
+        self.filterProgressCallback = filterProgressCallback
         nrows = 0
 
+        # background sorting
+        self.sortProgressCallback = sortProgressCallback
+        self.sortErrorCallback = sortErrorCallback
+        self.sortPollInterval = 50 # ms
+        self._sortjob = None
+        self._sortgeneration = 0
+
 
         self._table = TableCanvas(self._outerFrame,
                                   showkeynamesinheader=True,
@@ -91,6 +169,12 @@ class MultipageTable(Frame):
         self._table.adjustColumnWidths()
         return
 
+    def destroy(self):
+        if self._parallelfilter is not None:
+            self._parallelfilter.shutdown()
+        Frame.destroy(self)
+        return
+
     def __setPopupMenuEntries(self):
         T = self._table.showPopupMenuEntry
 
@@ -169,13 +253,65 @@ class MultipageTable(Frame):
 
         self._table.deletePopups()
         self._table.requireRowHeightReset()
-        if self._filteredData is not None:
-            self.replaceTableData(self._filteredData[datrange[0]:datrange[1]], rownames=rownames)
-        else:
-            self.replaceTableData(self._data[datrange[0]:datrange[1]], rownames=rownames)
+        self.replaceTableData(self._getPageRows(datrange), rownames=rownames)
         self._table.set_yviews('moveto', 0) # reset view to first line
         return
 
+    def _getShownData(self):
+        """Return the rows that the pages are taken from"""
+        if self._view is not None:
+            return self._view
+        return self._data
+
+    def _getUnsortedData(self):
+        """Return the rows passing the filter in data order"""
+        if self._filterids is not None:
+            return RowView(self._data, self._filterids)
+        return self._data
+
+    def _updateView(self):
+        """Set up the shown rows from the sort order and the filter, the
+        filtered rows keep the sort order of all rows"""
+        ids = self._sortorder
+        if self._filterids is not None:
+            if ids is None:
+                ids = self._filterids
+            else:
+                mask = np.zeros(len(self._data), dtype=bool)
+                mask[self._filterids] = True
+                ids = ids[mask[ids]]
+        self._view = None if ids is None else RowView(self._data, ids)
+        return
+
+    def _getPageRows(self, datrange):
+        """
+        Return the rows of a page. While a background sort is running, the
+        pages are taken from the sorted head of the rows, which is extended
+        when a page beyond it is requested.
+        """
+        job = self._sortjob
+        if job is None or job['head'] is None:
+            return self._getShownData()[datrange[0]:datrange[1]]
+        head = job['head']
+        if datrange[1] > len(head):
+            # grow in steps so that paging forward does not select each time
+            n = max(datrange[1], 2*len(head))
+            head = getSortedHead(self._getUnsortedData(), job['spec'], n, job['columndict'])
+            job['head'] = head
+            if head is None:
+                return self._getShownData()[datrange[0]:datrange[1]]
+        return head[datrange[0]:datrange[1]]
+
+    def _updateSortedHead(self):
+        """Select the sorted head of a running background sort again from
+        the rows passing the current filter"""
+        job = self._sortjob
+        if job is None or job['head'] is None:
+            return
+        job['head'] = getSortedHead(self._getUnsortedData(), job['spec'],
+                                    self._getPageDataRange()[1], job['columndict'])
+        return
+
     def __table_setData(self, data, rownames=None):
         #remove unrequired columns:
         if len(data) > 0:
@@ -193,8 +329,8 @@ class MultipageTable(Frame):
                     rname = rownames[idx]
                 self.__table_addRow(d, keyname=rname)
 
-        # remove unrequired rows:
-        self._table.model.deleteRows(list(reversed(range(len(data), self._table.model.getRowCount()))))
+        # remove unrequired rows in one pass:
+        self._table.model.deleteRows(range(len(data), self._table.model.getRowCount()))
         return
 
     def __table_replaceRow(self, dictdata, idx):
@@ -211,44 +347,187 @@ class MultipageTable(Frame):
 
     def _setFilteredData(self, rowids) -> int:
         if rowids is None:
-            if self._filteredData is not None:
+            if self._filterids is not None:
                 self.showAll()
             return len(self._data)
-        elif len(rowids) == 0:
-            self._filteredData = []
-            self._navtab.updateN(0)
-            n = 0
-        elif len(rowids) == 1:
-            self._filteredData = [self._data[rowids[0]]]
-            self._navtab.updateN(1)
-            n = 1
-        else:
-            self._filteredData = list(itemgetter(*rowids)(self._data))
-            self._navtab.updateN(len(self._filteredData))
-            n = len(rowids)
+        ids = np.asarray(rowids, dtype=np.intp)
+        if np.any(ids[1:] <= ids[:-1]):
+            # the filters give the ids in data order, other callbacks may not
+            ids = np.unique(ids)
+        self._filterids = ids
+        self._updateSortedHead()
+        self._updateView()
+        n = len(self._filterids)
+        self._navtab.updateN(n)
         self._changePage()
         return n
 
     def showAll(self):
-        self._filteredData = None
+        self._filterids = None
+        self._updateSortedHead()
+        self._updateView()
         self._navtab.updateN(len(self._data))
         self._changePage()
         return
 
     def triggerFiltering(self, doFilterCallback):
-        rowids = doFilterCallback(self._data, self.getColumnDict())
+        """doFilterCallback is called like TableFilter.doFiltering, the data
+           never changes, so its results can always be reused"""
+        rowids = doFilterCallback(self._data, self.getColumnDict(),
+                                  filterfunction=self._doFiltering,
+                                  dataversion=0)
         n = self._setFilteredData(rowids)
         return n
 
     def filterData(self, filters) -> int:
-        rowids = doFiltering(self._data, self.getColumnDict(), filters)
+        rowids = self._doFiltering(self._data, self.getColumnDict(), filters)
         n = self._setFilteredData(rowids)
         return n
 
+    def _doFiltering(self, data, columndict, filters, rows=None):
+        """Filter the data with the enabled filtering methods. If the
+           filter indexes narrow down the rows, only these are tested,
+           otherwise the rows are filtered on worker processes, with the
+           column-wise filtering or one by one, in this order"""
+        if data is not self._data or rows is not None:
+            return doFiltering(data, columndict, filters, rows=rows)
+        if self._filterindexes is not None:
+            rowids = filterIndexed(data, columndict, filters, self._filterindexes)
+            if rowids is not None:
+                return rowids
+        if self._parallelfilter is not None:
+            return self._parallelfilter.doFiltering(filters, columndict,
+                                                    progresscallback=self.filterProgressCallback)
+        if self._filterframe is not None:
+            return self._filterframe.doFiltering(filters, columndict)
+        return doFiltering(data, columndict, filters)
+
     def triggerSorting(self, doSortCallback):
-        """Function that is called when the sorting of the data is triggered."""
-        doSortCallback(self._data, self.getColumnDict())
-        if self._filteredData is not None:
-            doSortCallback(self._filteredData, self.getColumnDict())
+        """
+        Function that is called when the sorting of the data is triggered.
+        The sort order of all rows is computed in a worker thread, it is
+        applied to the shown rows and the current page is redrawn when it is
+        done. A sort that is still running is cancelled. The data itself is
+        not reordered, the filtered rows are taken from the same order.
+
+        doSortCallback is the TableSorter, e.g. the SortingPanel. Until the
+        sort is done the current page is shown from the first rows of the
+        sorted data, which are selected without sorting all rows. Any other
+        function sorting the rows in place like TableSorter.doSorting is
+        run on a copy of the rows, the pages are redrawn when it is done.
+
+        Columns NumPy cannot rank, e.g. mixed numbers and strings, and sort
+        functions that are not a TableSorter are sorted with the sort of
+        Python, which holds the interpreter lock. The table responds slowly
+        while many rows are sorted this way.
+        """
+        self.cancelSorting()
+        columndict = self.getColumnDict()
+        if isinstance(doSortCallback, TableSorter):
+            # read the sort specification here, not from the worker thread
+            spec = doSortCallback.getSortSpecification()
+            if len(spec) == 0:
+                self.revertSorting()
+                return
+            def sortfun(data, progress):
+                return getSortPermutation(data, spec, columndict, progresscallback=progress)
+            head = getSortedHead(self._getUnsortedData(), spec,
+                                 self._getPageDataRange()[1], columndict)
+        else:
+            def sortfun(data, progress):
+                # the callback sorts in place, find the rows in the sorted copy
+                rows = list(data)
+                doSortCallback(rows, columndict)
+                position = {id(row): i for i, row in enumerate(data)}
+                return np.array([position[id(row)] for row in rows], dtype=np.intp)
+            spec = None
+            head = None
+
+        self._sortgeneration += 1
+        job = {'generation': self._sortgeneration,
+               'callback': doSortCallback,
+               'spec': spec,
+               'columndict': columndict,
+               'head': head,
+               'cancel': threading.Event(),
+               'progress': 0.0,
+               'done': False,
+               'result': None,
+               'error': None}
+        data = self._data
+
+        def work():
+            def progress(fraction):
+                job['progress'] = fraction
+                return job['cancel'].is_set()
+            try:
+                job['result'] = sortfun(data, progress)
+            except UserInterruptException:
+                pass
+            except Exception as e:
+                job['error'] = e
+            job['done'] = True
+            return
+
+        self._sortjob = job
+        threading.Thread(target=work, daemon=True).start()
+        self.after(self.sortPollInterval, self._pollSorting, job)
+        if head is not None:
+            self._changePage()
+        return
+
+    def _pollSorting(self, job):
+        """Report the progress of a background sort and apply its result"""
+        if job['generation'] != self._sortgeneration:
+            return # cancelled or replaced by a newer sort
+        if not job['done']:
+            if self.sortProgressCallback is not None:
+                self.sortProgressCallback(job['progress'])
+            self.after(self.sortPollInterval, self._pollSorting, job)
+            return
+        self._sortjob = None
+        if job['error'] is not None:
+            error = job['error']
+            logger.error('Sorting the table failed', exc_info=error)
+            if self.sortErrorCallback is not None:
+                self.sortErrorCallback(error)
+            if job['head'] is not None:
+                # the sorted head was shown, show the previous order again
+                self._changePage()
+            return
+        if job['result'] is None:
+            return
+        self._sortorder = job['result']
+        self._updateView()
+        if self.sortProgressCallback is not None:
+            self.sortProgressCallback(1.0)
+        start, end = self._getPageDataRange()
+        head = job['head']
+        shown = self._getShownData()[start:end]
+        if head is None or len(head[start:end]) != len(shown) or \
+                any(a is not b for a, b in zip(head[start:end], shown)):
+            self._changePage()
+        return
+
+    def revertSorting(self):
+        """Show the rows in their original order"""
+        self.cancelSorting()
+        if self._sortorder is None:
+            return
+        self._sortorder = None
+        self._updateView()
         self._changePage()
         return
+
+    def cancelSorting(self):
+        """Stop a running background sort, the shown rows keep their order"""
+        if self._sortjob is None:
+            return
+        self._sortjob['cancel'].set()
+        self._sortjob = None
+        self._sortgeneration += 1
+        return
+
+    def isSorting(self) -> bool:
+        """True while a background sort is running"""
+        return self._sortjob is not None
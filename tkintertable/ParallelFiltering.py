@@ -0,0 +1,112 @@
+"""
+Filtering of large tables on several processes.
+
+Provides ParallelFilter, which splits the rows of a list of row dicts into
+chunks and tests them with the compiled filter of CellContentOperators in a
+concurrent.futures process pool. The worker processes get the rows once
+when the pool is started, each filtering only sends the filters and the
+row range of a chunk. The results are the same as those of
+CellContentOperators.doFiltering. A filtering blocks the calling thread
+until all chunks are done.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .CellContentOperators import compileFilters
+
+_rows = None    # the rows in a worker process
+
+
+def _setRows(rows):
+    global _rows
+    _rows = rows
+    return
+
+
+def _filterChunk(start, end, columndict, filters):
+    """Return the positions of the rows in [start, end) passing the filters"""
+    passes = compileFilters(filters, columndict)
+    rows = _rows
+    return [i for i in range(start, end) if passes(rows[i])]
+
+
+class ParallelFilter(object):
+    """
+    Filters a list of row dicts on a process pool. The pool is started on
+    the first filtering and kept until shutdown is called, the rows must
+    not change in the meantime.
+    """
+
+    def __init__(self, data, processes=None, chunksize=None):
+        """
+        Args:
+            data:       list of row dicts
+            processes:  number of worker processes, the number of CPUs if None
+            chunksize:  rows per task, chosen from the number of rows if None
+        """
+        self.data = data
+        self.processes = processes or os.cpu_count() or 1
+        if chunksize is None:
+            chunksize = max(10000, -(-len(data)//(4*self.processes)))
+        self.chunksize = chunksize
+        self._executor = None
+        return
+
+    def __repr__(self):
+        return 'ParallelFilter(%s rows, %s processes)' %(len(self.data), self.processes)
+
+    def _getExecutor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                 initializer=_setRows,
+                                                 initargs=(self.data,))
+        return self._executor
+
+    def doFiltering(self, filters=None, columndict=None, progresscallback=None):
+        """
+        Filter the rows, same as CellContentOperators.doFiltering.
+        Args:
+            filters:            list of tuples of the form (key,value,operator,bool)
+            columndict:         maps the keys of the filters to column names
+            progresscallback:   called with the progress between 0 and 1
+                                whenever a chunk is done
+        Returns the positions of the rows passing the filters in data order
+        or None if there are no filters. Waits for all chunks, so called on
+        the Tk thread the table does not respond until the filtering is
+        done.
+        """
+        if filters is None or len(filters) == 0:
+            return None
+        n = len(self.data)
+        if n <= self.chunksize:
+            passes = compileFilters(filters, columndict)
+            rowids = [i for i, row in enumerate(self.data) if passes(row)]
+            if progresscallback is not None:
+                progresscallback(1.0)
+            return rowids
+
+        filters = [tuple(f) for f in filters]
+        executor = self._getExecutor()
+        futures = {}
+        for k, start in enumerate(range(0, n, self.chunksize)):
+            end = min(start+self.chunksize, n)
+            futures[executor.submit(_filterChunk, start, end, columndict, filters)] = k
+        results = [None]*len(futures)
+        done = 0
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            done += 1
+            if progresscallback is not None:
+                progresscallback(done/len(futures))
+        rowids = []
+        for chunk in results:
+            rowids.extend(chunk)
+        return rowids
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        return
@@ -3,14 +3,22 @@
 from abc import ABC, abstractmethod
 from operator import itemgetter
 from functools import partial
+import heapq
+import numpy as np
+
+from .MultipageData import UserInterruptException
+
+_MISSING = object()
 
 
 def __getDictComprehension(lst):
     return {k: k for k, _ in lst}
 
-def __sortList(data, spec, columndict):
-    for key, rvrsed in reversed(spec):
-        data.sort(key=itemgetter(columndict[key]), reverse=rvrsed)
+def __reportProgress(progresscallback, fraction):
+    """Pass the progress to the callback, a callback returning True cancels
+    the sorting with a UserInterruptException"""
+    if progresscallback is not None and progresscallback(fraction):
+        raise UserInterruptException()
     return
 
 def __sortfun(k, key, columndict, thedict):
@@ -22,29 +30,139 @@ def __sortfun(k, key, columndict, thedict):
     else:
         return (1, 0)
 
-def __sortDict(thedict, keylist, spec, columndict):
-    for key, rvrsed in reversed(spec):
-        keylist.sort(key=partial(__sortfun,
-                                 key=key,
-                                 columndict=columndict,
-                                 thedict=thedict),
-                     reversed=rvrsed
-                     )
-    return
+def __isNumpyRankable(present, types):
+    """True if NumPy orders the values as Python does: floats, ints that
+    fit the array type, ints mixed with floats only if exact as floats and
+    strings without trailing NUL characters, which NumPy strips"""
+    if types == {float}:
+        return True
+    if types == {int}:
+        return all(-2**63 <= v < 2**63 for v in present)
+    if types == {int, float}:
+        return all(-2**53 <= v <= 2**53 for v in present if type(v) is int)
+    if types == {str}:
+        return not any(v.endswith('\x00') for v in present)
+    return False
+
+def __rankValues(values):
+    """Return the rank of each value among the distinct values, values
+    that are _MISSING get the rank after the largest value. Raises
+    TypeError if the values cannot be ordered, also for NaN, whose place
+    in a sort depends on the order of the values."""
+    present = [v for v in values if v is not _MISSING]
+    if any(type(v) is float and v != v for v in present):
+        raise TypeError('NaN values cannot be ranked')
+    types = set(map(type, present))
+    if len(present) > 0 and __isNumpyRankable(present, types):
+        uniq, inverse = np.unique(np.asarray(present), return_inverse=True)
+        if len(present) == len(values):
+            return inverse.ravel()
+        ranks = np.full(len(values), len(uniq), dtype=np.int64)
+        ranks[[i for i, v in enumerate(values) if v is not _MISSING]] = inverse.ravel()
+        return ranks
+    uniq = sorted(set(present))
+    rankof = {v: i for i, v in enumerate(uniq)}
+    return np.array([rankof[v] if v is not _MISSING else len(uniq) for v in values],
+                    dtype=np.int64)
+
+def __compositeOrder(rows, spec, getvalue, progresscallback=None):
+    """Order of the rows for all keys of spec at once, same as stable sorts
+    per key from the last to the first key."""
+    ranks = []
+    for i, (key, rvrsed) in enumerate(reversed(spec)):
+        __reportProgress(progresscallback, i/(len(spec)+1))
+        r = __rankValues([getvalue(row, key) for row in rows])
+        ranks.append(-r if rvrsed else r)
+    __reportProgress(progresscallback, len(spec)/(len(spec)+1))
+    # lexsort sorts by the last array first and is stable
+    return np.lexsort(ranks)
+
+def __multipassKey(data, key, columndict):
+    """Sort key of the rows for one column"""
+    if not isinstance(data, tuple):
+        return itemgetter(columndict[key])
+    return partial(__sortfun, key=key, columndict=columndict, thedict=data[0])
 
-def doSorting(data, spec, columndict=None):
-    """Perform the inplace sorting of the data, potentially in multiple passes."""
+def getSortPermutation(data, spec, columndict=None, composite=True, progresscallback=None):
+    """Return the sorted order of the rows as an array of row indices, data
+    itself is not changed. data is a list of row dicts or a tuple of a dict
+    of row dicts and the list of its keys, the indices refer to this list.
+    With composite the rows are ordered by all keys in a single pass,
+    columns whose values cannot be ranked, e.g. mixed numbers and strings,
+    fall back to one sort per key. The optional progresscallback is called
+    with the progress between 0 and 1, if it returns True the sorting is
+    cancelled by raising a UserInterruptException."""
+    rows = data if not isinstance(data, tuple) else data[1]
     if spec is None or len(spec) == 0:
-        return # do nothing
+        return np.arange(len(rows))
     if columndict is None:
         columndict = __getDictComprehension(spec)
 
-    if not isinstance(data, tuple):
-        __sortList(data, spec, columndict)
-    else:
-        __sortDict(data[0], data[1], spec, columndict)
+    order = None
+    if composite:
+        if not isinstance(data, tuple):
+            getters = {key: itemgetter(columndict[key]) for key, _ in spec}
+            def getvalue(row, key):
+                return getters[key](row)
+        else:
+            thedict = data[0]
+            def getvalue(k, key):
+                return thedict[k].get(columndict[key], _MISSING)
+        try:
+            order = __compositeOrder(rows, spec, getvalue, progresscallback)
+        except TypeError:
+            pass
+    if order is None:
+        indices = list(range(len(rows)))
+        for i, (key, rvrsed) in enumerate(reversed(spec)):
+            __reportProgress(progresscallback, i/len(spec))
+            keyfun = __multipassKey(data, key, columndict)
+            indices.sort(key=lambda j: keyfun(rows[j]), reverse=rvrsed)
+        order = np.array(indices, dtype=np.intp)
+    if progresscallback is not None:
+        progresscallback(1.0)
+    return order
+
+def doSorting(data, spec, columndict=None, composite=True, progresscallback=None):
+    """Perform the inplace sorting of the data, see getSortPermutation. If
+    the sorting is cancelled data is left unchanged."""
+    if spec is None or len(spec) == 0:
+        return # do nothing
+    order = getSortPermutation(data, spec, columndict, composite, progresscallback)
+    rows = data if not isinstance(data, tuple) else data[1]
+    rows[:] = [rows[i] for i in order]
     return
 
+class _Descending(object):
+    """Sort key wrapper that reverses the order of a value"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+def getSortedHead(data, spec, n, columndict=None):
+    """Return the first n rows of a list of row dicts in the order doSorting
+    gives them, without sorting all rows. Returns None if the rows cannot be
+    compared this way, e.g. mixed numbers and strings in a column."""
+    if spec is None or len(spec) == 0:
+        return data[:n]
+    if columndict is None:
+        columndict = __getDictComprehension(spec)
+    keys = [(columndict[key], rvrsed) for key, rvrsed in spec]
+    def sortkey(row):
+        return tuple(_Descending(row[c]) if rvrsed else row[c] for c, rvrsed in keys)
+    try:
+        # nsmallest is stable like the full sort, ties keep the data order
+        return heapq.nsmallest(n, data, key=sortkey)
+    except (TypeError, KeyError):
+        return None
+
 
 class TableSorter(ABC):
     @abstractmethod
@@ -54,8 +172,18 @@ class TableSorter(ABC):
         is a tuple of the column name and a "descend"-flag.
         """
 
-    def doSorting(self, data, columndict=None):
+    def __call__(self, data, columndict=None, progresscallback=None):
+        """The TableSorter is passed as sort callback, calling it sorts the
+        data like doSorting."""
+        return self.doSorting(data, columndict, progresscallback)
+
+    def doSorting(self, data, columndict=None, progresscallback=None):
         """Performs the sorting inplace on the given data."""
         specs = self.getSortSpecification()
-        doSorting(data, specs, columndict)
+        doSorting(data, specs, columndict, progresscallback=progresscallback)
         return
+
+    def getSortPermutation(self, data, columndict=None, progresscallback=None):
+        """Returns the sorted order of the given data as row indices."""
+        specs = self.getSortSpecification()
+        return getSortPermutation(data, specs, columndict, progresscallback=progresscallback)
@@ -98,7 +98,9 @@ class SortingPanel(Frame, TableSorter):
             parent:     parent widget
             fields:     list of column names
             callback:   function that gets called when a sort is triggered. It
-                            is called with one argument, providing the sort
+                            is called with one argument, the SortingPanel as
+                            TableSorter. Calling it like doSorting sorts the
+                            rows, getSortSpecification provides the sort
                             specification in the following format:
                             [(key0_colname, key0_isReversed),
                              (key1_colname, key1_isReversed),
@@ -191,7 +193,7 @@ class SortingPanel(Frame, TableSorter):
 
     def _triggerSorting(self):
         '''Calls the given sort callback to trigger the sorting.'''
-        self._sortCallback(self.doSorting)
+        self._sortCallback(self)
         return
 
     def getSortSpecification(self):
@@ -0,0 +1,221 @@
+"""
+Grid positions of table rows and columns.
+
+Provides CumulativePositions, the sorted array of row or column edge offsets
+used by TableCanvas for drawing and hit testing. Lookups of the row or column
+at a canvas coordinate are binary searches instead of scans over all rows.
+
+Row offsets are not stored per row: RowHeights keeps only the rows whose
+height differs from the default, with running sums over them, and
+RowPositions computes the offset of any row from these on demand.
+"""
+from bisect import bisect_left, insort
+from itertools import accumulate
+import numpy as np
+
+
+class CumulativePositions(object):
+    """
+    Edge offsets of consecutive cells along one axis. Entry i is the offset of
+    the leading edge of cell i, the last entry is the end of the last cell, so
+    there is one more entry than cells. Indexing returns floats and supports
+    negative indices like a list.
+    """
+
+    def __init__(self, sizes=(), start=0):
+        """
+        Args:
+            sizes:  the height or width of each cell
+            start:  offset of the first cell
+        """
+        sizes = np.asarray(sizes, dtype=float)
+        self._pos = np.empty(len(sizes)+1, dtype=float)
+        self._pos[0] = start
+        np.cumsum(sizes, out=self._pos[1:])
+        self._pos[1:] += start
+        return
+
+    def __len__(self):
+        return len(self._pos)
+
+    def __getitem__(self, i):
+        return float(self._pos[i])
+
+    def __iter__(self):
+        return iter(self._pos.tolist())
+
+    def __repr__(self):
+        return 'CumulativePositions(%s)' %self._pos.tolist()
+
+    def find(self, value):
+        """Return the first index whose offset is >= value, len(self) if
+           there is none, same as bisect_left"""
+        return int(np.searchsorted(self._pos, value, side='left'))
+
+    def size(self, i):
+        """Return the size of cell i"""
+        return float(self._pos[i+1]-self._pos[i])
+
+    def update(self, i, size):
+        """Set the size of cell i and shift the following offsets"""
+
+        delta = size - (self._pos[i+1]-self._pos[i])
+        if delta != 0:
+            self._pos[i+1:] += delta
+        return
+
+    def end(self):
+        """Return the offset of the end of the last cell"""
+        return float(self._pos[-1])
+
+
+class RowHeights(dict):
+    """
+    Dict of row -> height for the rows that do not have the default height,
+    as held in TableModel.rowheights. Keeps the overridden rows sorted with
+    the running sum of their heights, so the offset of a row can be found
+    without visiting the rows above it. The sums are rebuilt lazily after a
+    change, version is incremented on every change.
+    """
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self._rows = sorted(dict.keys(self))
+        self._sums = None
+        self.version = 0
+        return
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+    def _changed(self):
+        self._sums = None
+        self.version += 1
+        return
+
+    def __setitem__(self, row, height):
+        if row in self:
+            if dict.__getitem__(self, row) == height:
+                return
+        else:
+            insort(self._rows, row)
+        dict.__setitem__(self, row, height)
+        self._changed()
+        return
+
+    def __delitem__(self, row):
+        dict.__delitem__(self, row)
+        del self._rows[bisect_left(self._rows, row)]
+        self._changed()
+        return
+
+    def pop(self, row, *default):
+        if row in self:
+            height = dict.__getitem__(self, row)
+            del self[row]
+            return height
+        return dict.pop(self, row, *default)
+
+    def popitem(self):
+        row, height = dict.popitem(self)
+        del self._rows[bisect_left(self._rows, row)]
+        self._changed()
+        return row, height
+
+    def setdefault(self, row, height=None):
+        if row not in self:
+            self[row] = height
+        return dict.__getitem__(self, row)
+
+    def update(self, *args, **kwargs):
+        for row, height in dict(*args, **kwargs).items():
+            self[row] = height
+        return
+
+    def clear(self):
+        if len(self) == 0:
+            return
+        dict.clear(self)
+        self._rows = []
+        self._changed()
+        return
+
+    def copy(self):
+        return self.__class__(self)
+
+    def countBefore(self, row):
+        """Return the number of overridden rows above row and the sum of
+           their heights"""
+
+        if self._sums is None:
+            self._sums = [0] + list(accumulate(dict.__getitem__(self, r) for r in self._rows))
+        i = bisect_left(self._rows, row)
+        return i, self._sums[i]
+
+
+class RowPositions(object):
+    """
+    Row edge offsets computed on demand from a RowHeights, with the same
+    interface as CumulativePositions. The positions always reflect the
+    current heights, nothing has to be rebuilt when a row is resized.
+    """
+
+    def __init__(self, heights, rows, default, start=0):
+        """
+        Args:
+            heights:    RowHeights with the rows of non default height
+            rows:       number of rows
+            default:    height of the other rows
+            start:      offset of the first row
+        """
+        self.heights = heights
+        self.rows = rows
+        self.default = default
+        self.start = start
+        return
+
+    def __len__(self):
+        return self.rows+1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.rows+1
+        if i < 0 or i > self.rows:
+            raise IndexError('row position out of range')
+        return self.offset(i)
+
+    def __iter__(self):
+        for i in range(self.rows+1):
+            yield self.offset(i)
+
+    def offset(self, i):
+        """Return the offset of the top of row i"""
+
+        count, total = self.heights.countBefore(i)
+        return float(self.start + (i-count)*self.default + total)
+
+    def find(self, value):
+        """Return the first index whose offset is >= value, len(self) if
+           there is none, same as bisect_left"""
+
+        lo, hi = 0, self.rows+1
+        while lo < hi:
+            mid = (lo+hi)//2
+            if self.offset(mid) < value:
+                lo = mid+1
+            else:
+                hi = mid
+        return lo
+
+    def size(self, i):
+        """Return the height of row i"""
+        return float(self.heights.get(i, self.default))
+
+    def update(self, i, size):
+        """Set the height of row i"""
+        self.heights[i] = size
+        return
+
+    def end(self):
+        """Return the offset of the bottom of the last row"""
+        return self.offset(self.rows)
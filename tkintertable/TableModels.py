@@ -24,11 +24,66 @@
 from __future__ import absolute_import, division, print_function
 from .TableFormula import Formula
 from .CellContentOperators import doFiltering
+from .ColumnarData import ColumnarData
+from .TableLayout import RowHeights
+from .ColumnStatistics import ColumnStatistics
+from .FilterIndexes import FilterIndexes
 from types import *
 from collections import OrderedDict
-import operator
+from bisect import bisect_left
+import random
 import string, types, copy
 import pickle, os, sys, csv
+import numpy as np
+
+class RecordIndex(object):
+    """Maps record names to their position in a list of record names.
+       The mapping is rebuilt lazily when the list it was built for has been
+       replaced, resized or reordered in place"""
+
+    def __init__(self):
+        self.names = None
+        self.positions = {}
+        return
+
+    def rebuild(self, names):
+        """Index the given list of record names"""
+        self.names = names
+        self.positions = {name: i for i, name in enumerate(names)}
+        return
+
+    def invalidate(self):
+        """Force a rebuild on the next lookup"""
+        self.names = None
+        return
+
+    def isCurrent(self, names):
+        return names is self.names and len(self.positions) == len(names)
+
+    def lookup(self, names, recname):
+        """Return the position of recname in names, None if not present"""
+        if not self.isCurrent(names):
+            self.rebuild(names)
+        pos = self.positions.get(recname)
+        if pos is not None and names[pos] != recname:
+            #the list was reordered in place
+            self.rebuild(names)
+            pos = self.positions.get(recname)
+        return pos
+
+    def extended(self, names, count=1):
+        """Update the index after count names were appended to names"""
+        start = len(names)-count
+        if names is self.names and len(self.positions) == start:
+            for i in range(start, len(names)):
+                self.positions[names[i]] = i
+        return
+
+    def renamed(self, oldname, newname):
+        """Update the index after a name was replaced in place"""
+        if oldname in self.positions:
+            self.positions[newname] = self.positions.pop(oldname)
+        return
 
 class TableModel(object):
     """A base model for managing the data in a TableCanvas class"""
@@ -58,7 +113,7 @@ class TableModel(object):
                 del self.data['reclist']
                 self.reclist = temp
             else:
-                self.reclist = self.data.keys()
+                self.reclist = list(self.data.keys())
         else:
             #just make a new empty model
             self.createEmptyModel()
@@ -87,6 +142,11 @@ class TableModel(object):
             if columns != None:
                 self.autoAddColumns(columns)
         self.filteredrecs = None
+        self.longestentries = {}
+        self.columnstats = {}
+        self.sortkeys = {}
+        self.filterindexes = None
+        self.dataversion += 1
         return
 
     def initialiseFields(self):
@@ -103,7 +163,15 @@ class TableModel(object):
         self.editable={}
         self.nodisplay = []
         self.columnwidths={} #used to store col widths, not held in saved data
-        self.rowheights={} 
+        self.rowheights=RowHeights()    #rows of non default height only
+        self.recindex = RecordIndex()       #positions of records in reclist
+        self.filteredindex = RecordIndex()  #positions of records in filteredrecs
+        self.longestentries = {}    #column name -> longest entry found, see getlongestEntry
+        self.widthsamplesize = 1000 #rows sampled for getlongestEntry, None to read all
+        self.columnstats = {}       #column name -> ColumnStatistics, see getColumnStatistics
+        self.sortkeys = {}          #column name -> (record name -> sort key, numeric), see getSortKeys
+        self.filterindexes = None   #FilterIndexes of data, see getFilterIndexes
+        self.dataversion = 0        #incremented on every change of data, see TableFilter.doFiltering
         return
 
     def createEmptyModel(self):
@@ -154,6 +222,11 @@ class TableModel(object):
         #add the data
         self.data.update(newdata)
         self.reclist = list(self.data.keys())
+        self.longestentries = {}
+        self.columnstats = {}
+        self.sortkeys = {}
+        self.filterindexes = None
+        self.dataversion += 1
         return
 
     def getDefaultTypes(self):
@@ -163,7 +236,7 @@ class TableModel(object):
     def getData(self):
         """Return the current data for saving"""
 
-        data = copy.deepcopy(self.data)
+        data = copy.deepcopy(dict(self.data))
         data['colors'] = self.colors
         data['columnnames'] = self.columnNames
         #we keep original record order
@@ -202,21 +275,113 @@ class TableModel(object):
                 collist.append(v)
         return collist
 
-    def getlongestEntry(self, columnIndex):
-        """Get the longest cell entry in the col"""
+    def getlongestEntry(self, columnIndex, rows=None):
+        """Get the longest cell entry in the col. Tables with more than
+           widthsamplesize rows are not read in full, the length is taken
+           from the first, last and randomly chosen rows plus the given rows,
+           e.g. the visible ones. The result is kept per column and updated
+           when cells are set or rows added"""
 
-        collist = self.getColCells(columnIndex)
-        maxw=5
-        for c in collist:
-            try:
-                w = len(str(c))
-            except UnicodeEncodeError:
-                pass
+        colname = self.getColumnName(columnIndex)
+        if self.getColumnType(columnIndex) == 'Link':
+            return len('xxxxxx')
+        stats = self.columnstats.get(colname)
+        if stats is not None and not stats.stale and stats.objects == 0:
+            return max(5, stats.maxlength)
+        nrows = len(self.reclist)
+        if colname in self.longestentries:
+            maxw = self.longestentries[colname]
+            sample = []
+        else:
+            maxw = 5
+            size = self.widthsamplesize
+            if size is None or nrows <= size:
+                sample = range(nrows)
+            else:
+                part = size//4
+                sample = list(range(part)) + list(range(nrows-part, nrows))
+                sample.extend(random.sample(range(part, nrows-part), size-2*part))
+        if rows is not None:
+            sample = set(sample)
+            sample.update(r for r in rows if 0 <= r < nrows)
+        for row in sample:
+            w = self.getEntryLength(self.getValueAt(row, columnIndex))
             if w > maxw:
                 maxw = w
+        self.longestentries[colname] = maxw
         #print 'longest width', maxw
         return maxw
 
+    def getEntryLength(self, value):
+        """Length of a cell entry as used for column widths"""
+        try:
+            return len(str(value))
+        except UnicodeEncodeError:
+            return 0
+
+    def getColumnStatistics(self, colname):
+        """Return the ColumnStatistics of the raw values of a column. They
+           are computed on first use and then kept up to date by the
+           model's editing methods, a rescan is only needed if a removed
+           value was the minimum, maximum or longest one"""
+
+        stats = self.columnstats.get(colname)
+        if stats is None or stats.stale:
+            stats = ColumnStatistics()
+            for name in self.reclist:
+                stats.add(self.data[name].get(colname))
+            self.columnstats[colname] = stats
+        return stats
+
+    def updateColumnStatistics(self, colname, old, new):
+        """Take a changed cell into account in the kept statistics"""
+        stats = self.columnstats.get(colname)
+        if stats is not None:
+            stats.replace(old, new)
+        self.sortkeys.pop(colname, None)
+        return
+
+    def forgetSortKeys(self, names):
+        """Remove records from the kept sort keys of all columns, so that
+           a record added later under one of the names gets new keys"""
+        for keymap, numeric in self.sortkeys.values():
+            for name in names:
+                keymap.pop(name, None)
+        return
+
+    def getFilterIndexes(self):
+        """Return the FilterIndexes used to filter the records. The index
+           of a column is built by the first filter that can use it and then
+           kept up to date by the model's editing methods"""
+
+        if self.filterindexes is None or self.filterindexes.data is not self.data:
+            self.filterindexes = FilterIndexes(self.data)
+        return self.filterindexes
+
+    def updateFilterIndexes(self, name, colname, old, new):
+        """Take a changed cell into account in the kept filter indexes and
+           the data version, old or new are FilterIndexes.MISSING if the
+           cell had or has no value"""
+        if self.filterindexes is not None:
+            self.filterindexes.replace(name, colname, old, new)
+        self.dataversion += 1
+        return
+
+    def doFiltering(self, data, columndict=None, filters=None, rows=None):
+        """Filter the records like CellContentOperators.doFiltering, using
+           the filter indexes if data is the model's data"""
+        if data is self.data and rows is None:
+            return doFiltering(data, columndict, filters, indexes=self.getFilterIndexes())
+        return doFiltering(data, columndict, filters, rows=rows)
+
+    def updateLongestEntry(self, colname, value):
+        """Take a new cell value into account in the kept longest entries"""
+        if colname in self.longestentries:
+            w = self.getEntryLength(value)
+            if w > self.longestentries[colname]:
+                self.longestentries[colname] = w
+        return
+
     def getRecordAtRow(self, rowIndex):
         """Get the entire record at the specifed row."""
 
@@ -245,6 +410,8 @@ class TableModel(object):
         coltype = self.columntypes[colname]
         name = self.getRecName(rowIndex)
         if colname in self.data[name]:
+            self.updateColumnStatistics(colname, self.data[name][colname], None)
+            self.updateFilterIndexes(name, colname, self.data[name][colname], FilterIndexes.MISSING)
             del self.data[name][colname]
         return
 
@@ -266,11 +433,23 @@ class TableModel(object):
         if len(self.reclist)==0:
             return None
         currname = self.getRecName(rowIndex)
-        self.reclist[rowIndex] = newname
+        self.reclist[self.getRecordIndex(currname)] = newname
+        self.recindex.renamed(currname, newname)
+        if self.filteredrecs != None:
+            self.filteredrecs[rowIndex] = newname
+            self.filteredindex.renamed(currname, newname)
         temp = copy.deepcopy(self.data[currname])
         self.data[newname] = temp
         #self.data[newname]['Name'] = newname
         del self.data[currname]
+        if self.filterindexes is not None:
+            self.filterindexes.remove(currname, temp)
+            self.filterindexes.add(newname, temp)
+        for keymap, numeric in self.sortkeys.values():
+            keymap.pop(newname, None)
+            if currname in keymap:
+                keymap[newname] = keymap.pop(currname)
+        self.dataversion += 1
         for key in ['bg', 'fg']:
             if currname in self.colors[key]:
                 temp = copy.deepcopy(self.colors[key][currname])
@@ -294,29 +473,54 @@ class TableModel(object):
          else:
              cell = self.getCellRecord(rowIndex, columnIndex)
              columnName = self.getColumnName(columnIndex)
-         if cell == None:
-             cell=''
-         # Set the value based on the data record field
          coltype = self.columntypes[columnName]
-         if Formula.isFormula(cell) == True:
-             value = self.doFormula(cell)
-             return value
-
-         if not type(cell) is dict:
-             if coltype == 'text' or coltype == 'Text':
-                 value = cell
-             elif coltype == 'number':
-                 value = str(cell)
-             else:
-                 value = 'other'
-         if value==None:
-             value=''
-         return value
+         return self.formatCell(cell, coltype)
+
+    def formatCell(self, cell, coltype):
+        """Return the value displayed for the raw cell data of a column
+           with the given type"""
+
+        value = None
+        if cell == None:
+            cell=''
+        # Set the value based on the data record field
+        if Formula.isFormula(cell) == True:
+            value = self.doFormula(cell)
+            return value
+
+        if not type(cell) is dict:
+            if coltype == 'text' or coltype == 'Text':
+                value = cell
+            elif coltype == 'number':
+                value = str(cell)
+            else:
+                value = 'other'
+        if value==None:
+            value=''
+        return value
+
+    def getRecordAttributes(self, names, columnName):
+        """Get the displayed attribute of the given records at a column"""
 
-    def getRecordIndex(self, recname):
-        rowIndex = int(self.reclist.index(recname))
+        return [self.getRecordAttributeAtColumn(recName=rec, columnName=columnName)
+                    for rec in names]
+
+    def getRecordIndex(self, recname, filtered=False):
+        """Get the row number of a record. If filtered is True the row in
+           the currently filtered records is returned, if a filter is applied"""
+
+        if filtered == True and self.filteredrecs != None:
+            rowIndex = self.filteredindex.lookup(self.filteredrecs, recname)
+        else:
+            rowIndex = self.recindex.lookup(self.reclist, recname)
+        if rowIndex == None:
+            raise ValueError('%s is not in list' %recname)
         return rowIndex
 
+    def hasRecord(self, recname):
+        """Check if a record of this name is in the table"""
+        return self.recindex.lookup(self.reclist, recname) != None
+
     def setSortOrder(self, columnIndex=None, columnName=None, reverse=0):
         """Changes the order that records are sorted in, which will
            be reflected in the table upon redrawing"""
@@ -329,25 +533,54 @@ class TableModel(object):
             return
         self.reclist = list(self.createSortMap(self.reclist, self.sortkey, reverse))
         if self.filteredrecs != None:
-            self.filteredrecs = self.createSortMap(self.filteredrecs, self.sortkey, reverse)
+            #the filtered records keep the order of the sorted reclist
+            shown = set(self.filteredrecs)
+            self.filteredrecs = [n for n in self.reclist if n in shown]
         return
 
+    def getSortKeys(self, colname):
+        """Return a dict of record name to sort key for a column and whether
+           the keys are numbers. The keys are the displayed values, as
+           floats if all of them are numeric. They are kept until the
+           column is modified, columns with formulas are not kept"""
+
+        cached = self.sortkeys.get(colname)
+        if cached is not None:
+            return cached
+        names = self.reclist
+        recdata = self.getRecordAttributes(names, colname)
+        numeric = False
+        #try create list of floats if col has numbers only
+        stats = self.getColumnStatistics(colname)
+        if stats.objects > 0 or stats.strings == 0:
+            try:
+                recdata = self.toFloats(recdata)
+                numeric = True
+            except (ValueError, TypeError):
+                pass
+        keys = (dict(zip(names, recdata)), numeric)
+        if stats.objects == 0:
+            self.sortkeys[colname] = keys
+        return keys
+
     def createSortMap(self, names, sortkey, reverse=0):
         """Create a sort mapping for given list"""
 
-        recdata = []
-        for rec in names:
-            recdata.append(self.getRecordAttributeAtColumn(recName=rec, columnName=sortkey))
-        #try create list of floats if col has numbers only
-        try:
-            recdata = self.toFloats(recdata)
-        except:
-            pass
-        smap = zip(names, recdata)
-        #sort the mapping by the second key
-        smap = sorted(smap, key=operator.itemgetter(1), reverse=reverse)
-        #now sort the main reclist by the mapping order
-        sortmap = map(operator.itemgetter(0), smap)
+        keymap, numeric = self.getSortKeys(sortkey)
+        if any(n not in keymap for n in names):
+            #records added since the keys were kept
+            self.sortkeys.pop(sortkey, None)
+            keymap, numeric = self.getSortKeys(sortkey)
+        keys = [keymap[n] for n in names]
+        if numeric:
+            keys = np.array(keys, dtype=float)
+            if reverse:
+                keys = -keys
+            order = np.argsort(keys, kind='stable').tolist()
+        else:
+            order = sorted(range(len(names)), key=keys.__getitem__, reverse=reverse)
+        #now sort the names by the key order
+        sortmap = [names[i] for i in order]
         return sortmap
 
     def toFloats(self, l):
@@ -397,7 +630,7 @@ class TableModel(object):
             return
         if key==None:
             key = self.getNextKey()
-        if key in self.data or key in self.reclist:
+        if key in self.data or self.hasRecord(key):
             print ('name already present!!')
             return
         self.data[key]={}
@@ -405,25 +638,94 @@ class TableModel(object):
             if not k in self.columnNames:
                 self.addColumn(k)
             self.data[key][k] = str(kwargs[k])
+            self.updateLongestEntry(k, self.data[key][k])
+            self.sortkeys.pop(k, None)
+        self.forgetSortKeys([key])
+        for colname, stats in self.columnstats.items():
+            stats.add(self.data[key].get(colname))
+        if self.filterindexes is not None:
+            self.filterindexes.add(key, self.data[key])
+        self.dataversion += 1
         self.reclist.append(key)
+        self.recindex.extended(self.reclist)
         return key
 
     def deleteRow(self, rowIndex=None, key=None, update=True):
         """Delete a row"""
-        if key == None or not key in self.reclist:
+        if key == None or not self.hasRecord(key):
             key = self.getRecName(rowIndex)
+        for colname, stats in self.columnstats.items():
+            stats.remove(self.data[key].get(colname))
+        if self.filterindexes is not None:
+            self.filterindexes.remove(key, self.data[key])
         del self.data[key]
+        self.forgetSortKeys([key])
+        self.dataversion += 1
         if update==True:
-            self.reclist.remove(key)
+            del self.reclist[self.getRecordIndex(key)]
+            self.recindex.invalidate()
         return
 
-    def deleteRows(self, rowlist=None):
-        """Delete multiple or all rows"""
-        if rowlist == None:
-            rowlist = range(len(self.reclist))
-        names = [self.getRecName(i) for i in rowlist]
+    def deleteRows(self, rowlist=None, keys=None):
+        """Delete multiple or all rows in a single pass. Rows can be given
+           by row index in rowlist or by record name in keys, all rows
+           are deleted if neither is given"""
+        if rowlist == None and keys == None:
+            self.data.clear()
+            self.reclist = []
+            if self.filteredrecs != None:
+                self.filteredrecs = []
+            self.resetcolors()
+            self.rowheights.clear()
+            self.columnstats = {}
+            self.sortkeys = {}
+            self.filterindexes = None
+            self.dataversion += 1
+            return
+        rows = set()
+        names = set()
+        if rowlist != None:
+            for row in rowlist:
+                rows.add(row)
+                names.add(self.getRecName(row))
+        if keys != None:
+            for key in keys:
+                if not self.hasRecord(key) or key in names:
+                    continue
+                names.add(key)
+                if self.filteredrecs == None:
+                    rows.add(self.getRecordIndex(key))
+                else:
+                    row = self.filteredindex.lookup(self.filteredrecs, key)
+                    if row != None:
+                        rows.add(row)
+        if len(names) == 0:
+            return
+        self.forgetSortKeys(names)
+        self.dataversion += 1
+        self.reclist = [n for n in self.reclist if n not in names]
+        if self.filteredrecs != None:
+            self.filteredrecs = [n for n in self.filteredrecs if n not in names]
         for name in names:
-            self.deleteRow(key=name, update=True)
+            if name in self.data:
+                for colname, stats in self.columnstats.items():
+                    stats.remove(self.data[name].get(colname))
+                if self.filterindexes is not None:
+                    self.filterindexes.remove(name, self.data[name])
+                del self.data[name]
+            for key in ['bg', 'fg']:
+                self.colors[key].pop(name, None)
+        #rows below deleted rows move up
+        if len(self.rowheights) > 0:
+            removed = sorted(rows)
+            heights = {}
+            for row in self.rowheights:
+                i = bisect_left(removed, row)
+                if i < len(removed) and removed[i] == row:
+                    continue
+                heights[row-i] = self.rowheights[row]
+            self.rowheights.clear()
+            self.rowheights.update(heights)
         return
 
     def addColumn(self, colname=None, coltype=None):
@@ -448,6 +750,12 @@ class TableModel(object):
         self.columnNames.remove(colname)
         del self.columnlabels[colname]
         del self.columntypes[colname]
+        self.longestentries.pop(colname, None)
+        self.columnstats.pop(colname, None)
+        self.sortkeys.pop(colname, None)
+        if self.filterindexes is not None:
+            self.filterindexes.dropColumn(colname)
+        self.dataversion += 1
         #remove this field from every record
         for recname in self.reclist:
             if colname in self.data[recname]:
@@ -481,12 +789,21 @@ class TableModel(object):
         #we don't use addRow as it's too slow
         keys = range(start,start+numrows)
         #make sure no keys are present already
-        keys = list(set(keys)-set(self.reclist))
+        keys = [k for k in keys if not self.hasRecord(k)]
         newdata = {}
         for k in keys:
             newdata[k] = {}
         self.data.update(newdata)
+        for stats in self.columnstats.values():
+            for k in keys:
+                stats.add(None)
+        if self.filterindexes is not None:
+            for k in keys:
+                self.filterindexes.add(k, newdata[k])
+        self.forgetSortKeys(keys)
+        self.dataversion += 1
         self.reclist.extend(newdata.keys())
+        self.recindex.extended(self.reclist, len(keys))
         return keys
 
     def autoAddColumns(self, numcols=None):
@@ -545,7 +862,7 @@ class TableModel(object):
             filters is a tuple of the form (key,value,operator,bool)"""
         if columnIndex != None and columnIndex < len(self.columnNames):
             columnName = self.getColumnName(columnIndex)
-        rowids = doFiltering(self.data, self.getColumnDict(), filters=filters)
+        rowids = self.doFiltering(self.data, self.getColumnDict(), filters=filters)
         if rowids is None:
             rowids = list(range(len(self.data)))
         coldata = [self.data[n][columnName] for n in rowids]
@@ -602,6 +919,8 @@ class TableModel(object):
         name = self.getRecName(rowIndex)
         colname = self.getColumnName(columnIndex)
         coltype = self.columntypes[colname]
+        old = self.data[name].get(colname)
+        oldcell = self.data[name].get(colname, FilterIndexes.MISSING)
         if coltype == 'number':
             try:
                 if value == '': #need this to allow deletion of values
@@ -612,6 +931,11 @@ class TableModel(object):
                 pass
         else:
             self.data[name][colname] = value
+        if colname in self.data[name]:
+            self.updateLongestEntry(colname, self.data[name][colname])
+        self.updateColumnStatistics(colname, old, self.data[name].get(colname))
+        self.updateFilterIndexes(name, colname, oldcell,
+                                 self.data[name].get(colname, FilterIndexes.MISSING))
         return
 
     def setFormulaAt(self, f, rowIndex, columnIndex):
@@ -621,6 +945,8 @@ class TableModel(object):
         coltype = self.columntypes[colname]
         rec = {}
         rec['formula'] = f
+        self.updateColumnStatistics(colname, self.data[name].get(colname), rec)
+        self.updateFilterIndexes(name, colname, self.data[name].get(colname, FilterIndexes.MISSING), rec)
         self.data[name][colname] = rec
         return
 
@@ -658,7 +984,7 @@ class TableModel(object):
     def getRecAtRow(self, recname, colname, offset=1, dim='y'):
         """Get the record name at a specified offset in the current
            table from the record given, by using the current sort order"""
-        thisrow = self.getRecordIndex(recname)
+        thisrow = self.getRecordIndex(recname, filtered=True)
         thiscol = self.getColumnIndex(colname)
         #table goto next row
         if dim == 'y':
@@ -724,6 +1050,10 @@ class TableModel(object):
                         if not f in self.columnNames:
                             self.addColumn(f)
                         self.data[rec][f] = model.data[rec][f]
+        self.columnstats = {}
+        self.sortkeys = {}
+        self.filterindexes = None
+        self.dataversion += 1
         return
 
     def save(self, filename=None):
@@ -745,10 +1075,69 @@ class TableModel(object):
 
     def copy(self):
         """Return a copy of this model"""
-        M = TableModel()
+        M = self.__class__()
         data = self.getData()
         M.setupModel(data)
         return M
 
     def __repr__(self):
         return 'Table Model with %s rows' %len(self.reclist)
+
+
+class ColumnarTableModel(TableModel):
+    """A table model that keeps its data column by column in a ColumnarData
+       store instead of one dict per record. It provides the same interface
+       as TableModel but needs much less memory for large tables and reads
+       whole columns without a lookup per record"""
+
+    def setupModel(self, newdict, rows=None, columns=None):
+        """Create table model"""
+
+        TableModel.setupModel(self, newdict, rows, columns)
+        if not isinstance(self.data, ColumnarData):
+            self.data = ColumnarData(self.data)
+        return
+
+    def createEmptyModel(self):
+        """Create the basic empty model"""
+
+        TableModel.createEmptyModel(self)
+        self.data = ColumnarData()
+        return
+
+    def getColCells(self, colIndex):
+        """Get the viewable contents of a col into a list"""
+
+        coltype = self.getColumnType(colIndex)
+        if coltype == 'Link':
+            return ['xxxxxx']
+        names = [self.getRecName(row) for row in range(len(self.reclist))]
+        cells = self.data.getColumnValues(self.getColumnName(colIndex), names)
+        return [self.formatCell(c, coltype) for c in cells]
+
+    def getRecordAttributes(self, names, columnName):
+        """Get the displayed attribute of the given records at a column"""
+
+        coltype = self.columntypes[columnName]
+        cells = self.data.getColumnValues(columnName, names)
+        return [self.formatCell(c, coltype) for c in cells]
+
+    def getColumnData(self, columnIndex=None, columnName=None,
+                        filters=None):
+        """Return the data in a list for this col,
+            filters is a tuple of the form (key,value,operator,bool)"""
+        if columnIndex != None and columnIndex < len(self.columnNames):
+            columnName = self.getColumnName(columnIndex)
+        rowids = self.doFiltering(self.data, self.getColumnDict(), filters=filters)
+        if rowids is None:
+            rowids = self.reclist
+        return self.data.getColumnValues(columnName, rowids)
+
+    def deleteColumn(self, columnIndex):
+        """delete a column"""
+        self.data.dropColumn(self.getColumnName(columnIndex))
+        TableModel.deleteColumn(self, columnIndex)
+        return
+
+    def __repr__(self):
+        return 'Columnar Table Model with %s rows' %len(self.reclist)
@@ -42,15 +42,18 @@ from .TableModels import TableModel
 from .TableFormula import Formula
 from .Prefs import Preferences
 from .FilterDialogFactoryInterface import FilterDialogFactoryInterface as FDFI
+from .CanvasItemPool import CanvasItemPool
+from .TableLayout import CumulativePositions, RowHeights, RowPositions
+from .FontMetrics import getFontMetrics, saveFontMetrics
 from .Dialogs import *
 
 import math, time
 import os, types
 import copy
 import platform
-import numpy as np
 from bisect import bisect_left
 from collections import defaultdict
+from contextlib import contextmanager
 
 class TableCanvas(Canvas):
     """A tkinter class for providing table functionality"""
@@ -82,8 +85,9 @@ class TableCanvas(Canvas):
         self.multiplerowlist=[]
         self.multiplecollist=[]
         self.columnTooltipEnable=defaultdict(lambda: True)
-        self.col_positions=[]       #record current column grid positions
-        self.row_positions=[] 
+        self.col_positions=CumulativePositions()       #record current column grid positions
+        self.colsizes=None          #column widths and start that col_positions was set up from
+        self.row_positions=CumulativePositions()
         self.minrowheights=defaultdict(lambda : self.minrowheight)
         self.maxcellwidth = defaultdict(lambda: self.defaultmaxcellwidth)
         self.mode = 'normal'
@@ -93,6 +97,17 @@ class TableCanvas(Canvas):
         self.rowUpdateRequired = False
         self.resetToMinRowHeight = False
         self.filterdialogfactory = filterdialogfactory
+        #canvas items of the visible cells, recycled between redraws
+        self.textpool = CanvasItemPool(self, 'text')
+        self.linkpool = CanvasItemPool(self, 'text')
+        self.fillpool = CanvasItemPool(self, 'rectangle')
+        self.gridpool = CanvasItemPool(self, 'line')
+        self.drawnlayout = None     #layout of the last full redraw, see redrawScrolled
+        self.dirty = self.newDirtyRegions() #parts waiting for a scheduled redraw
+        self.redrawjob = None
+        self.batchdepth = 0
+        self.displaycache = {}      #(recname, colname) -> fitted cell text, see getCellDisplayText
+        self.displaycachesize = 100000
         if self.filterdialogfactory is not None:
             self.filterdialogfactory.subscribe(self.triggerFiltering, self.showAll)
 
@@ -145,6 +160,7 @@ class TableCanvas(Canvas):
         self.rowheaderwidth=40
         self.showkeynamesinheader=False
         self.thefont = ('Arial',12)
+        self.storefontmetrics = False   #keep the character widths in a file, see getMetricsDir
         self.bgcolor = '#F7F7FA'
         self.fgcolor = 'black'
         self.entrybackgr = 'white'
@@ -192,17 +208,23 @@ class TableCanvas(Canvas):
         return
 
     def initFontSizeTable(self):
-        symbols = list(map(lambda x: chr(x), range(255)))
-        def constant_factory(c):
-            return lambda: c
-        symbol_sizes = defaultdict()
-        for sym in symbols:
-            txttmp = self.create_text(50, 50, text=sym)
-            size = self.bbox(txttmp)
-            symbol_sizes[sym] = size[2]-size[0]
-            self.delete(txttmp)
-        symbol_sizes.default_factory = constant_factory(int(np.median(list(symbol_sizes.values()))))
-        self.fontSizeTable = symbol_sizes
+        """Get the character widths of the current cell font, these are
+           shared by all tables and measured only once per font"""
+
+        self.fontSizeTable = getFontMetrics(self, self.thefont, self.getMetricsDir())
+        self.fontSizeTableFont = self.thefont
+        return
+
+    def getMetricsDir(self):
+        """Directory for storing font metrics, that of the prefs file, None
+           if storefontmetrics is not set"""
+
+        if not self.storefontmetrics:
+            return None
+        pref_file = getattr(self.prefs, 'pref_file', None)
+        if pref_file is None:
+            return None
+        return os.path.dirname(pref_file)
 
     def mouse_wheel(self, event):
         """Handle mouse wheel scroll for windows"""
@@ -215,7 +237,7 @@ class TableCanvas(Canvas):
                 return
             event.widget.yview_scroll(-1, UNITS)
             self.tablerowheader.yview_scroll(-1, UNITS)
-        self.redrawVisible()
+        self.redrawScrolled()
         return
 
     def do_bindings(self):
@@ -235,6 +257,7 @@ class TableCanvas(Canvas):
 
         self.bind('<B1-Motion>', self.handle_mouse_drag)
         self.bind('<Motion>', self.handle_motion)
+        self.tag_bind('hlink', '<Double-Button-1>', self.check_hyperlink)
 
         self.bind_all("<Control-x>", self.deleteRow)
         self.bind_all("<Control-n>", self.addRow)
@@ -265,6 +288,7 @@ class TableCanvas(Canvas):
     def setModel(self, model):
         """Set a new model - requires redraw to reflect changes"""
         self.model = model
+        self.displaycache.clear()
         return
 
     def createfromDict(self, data):
@@ -308,7 +332,7 @@ class TableCanvas(Canvas):
 
         self.adjustColumnWidths()
         self.redrawTable(callback=callback)
-        self.parentframe.bind("<Configure>", self.redrawVisible)
+        self.parentframe.bind("<Configure>", self.scheduleRedraw)
         self.tablecolheader.xview("moveto", 0)
         self.xview("moveto", 0)
         return
@@ -328,35 +352,16 @@ class TableCanvas(Canvas):
         """Get current row from canvas position"""
 
         h = self.rowheight
-        #y_start = self.y_start
-        #row = (int(y)-y_start)/h
-        #if row < 0:
-        #    return 0
-        #if row > self.rows:
-        #    row = self.rows
-        #return row
-        i=0
-        row=0
-        for r in self.row_positions:
-            row = i
-            if r+h>=y:
-                break
-            i+=1
-        return row
+        #first row whose top is within h of y, else the last position
+        row = self.row_positions.find(y-h)
+        return max(0, min(row, len(self.row_positions)-1))
 
     def getColPosition(self, x):
         """Get current col from canvas position"""
 
-        x_start = self.x_start
         w = self.cellwidth
-        i=0
-        col=0
-        for c in self.col_positions:
-            col = i
-            if c+w>=x:
-                break
-            i+=1
-        return col
+        col = self.col_positions.find(x-w)
+        return max(0, min(col, len(self.col_positions)-1))
 
     def getVisibleRows(self, y1, y2):
         """Get the visible row range"""
@@ -379,7 +384,10 @@ class TableCanvas(Canvas):
     def redrawVisible(self, event=None, callback=None):
         """Redraw the visible portion of the canvas"""
 
-        model = self.model
+        #a full redraw covers anything scheduled so far
+        self.dirty = self.newDirtyRegions()
+        if self.thefont != self.fontSizeTableFont:
+            self.initFontSizeTable()
         self.rows = self.model.getRowCount()
         self.cols = self.model.getColumnCount()
 
@@ -398,38 +406,125 @@ class TableCanvas(Canvas):
         self.configure(scrollregion=(0,0, self.tablewidth+self.x_start,
                 self.tableheight+self.y_start))
 
-        x1, y1, x2, y2 = self.getVisibleRegion()
-        startvisiblerow, endvisiblerow = self.getVisibleRows(y1, y2)
-        self.visiblerows = range(max(0, startvisiblerow-1), min(self.rows, endvisiblerow+1))
-        startvisiblecol, endvisiblecol = self.getVisibleCols(x1, x2)
-        self.visiblecols = range(max(0, startvisiblecol-1), min(endvisiblecol+1, self.cols))
+        startvisiblerow, endvisiblerow = self.setVisibleRange()
 
         if self.cols == 0 or self.rows == 0:
             self.delete('entry')
             self.delete('rowrect')
             self.delete('currentrect')
-            self.delete('gridline','text')
+            self.clearCellItems()
+            self.drawnlayout = None
             self.tablerowheader.redraw()
             return
 
+        self.drawnlayout = self.getLayoutKey()
         self.drawGrid(startvisiblerow, endvisiblerow)
         align = self.align
-        self.delete('fillrect')
-        for row in self.visiblerows:
+        cellpools = [self.textpool, self.linkpool, self.fillpool]
+        for pool in cellpools:
+            pool.beginFrame()
+        #fit the texts column by column, then draw row by row
+        coltexts = [self.getColumnDisplayTexts(self.visiblerows, col) for col in self.visiblecols]
+        for i, row in enumerate(self.visiblerows):
             if callback != None:
                 callback()
-            for col in self.visiblecols:
-                colname = model.getColumnName(col)
-                bgcolor = model.getColorAt(row,col, 'bg')
-                fgcolor = model.getColorAt(row,col, 'fg')
-                text = model.getValueAt(row,col)
-                self.drawText(row, col, text, fgcolor, align)
-                if bgcolor != None:
-                    self.drawRect(row,col, color=bgcolor)
+            for j, col in enumerate(self.visiblecols):
+                self.drawCellContent(row, col, align, display=coltexts[j][i])
+        for pool in cellpools:
+            pool.endFrame()
+        self.lower('fillrect')
         self.rowUpdate()
         
         self.tablecolheader.redraw()
         self.tablerowheader.redraw(align=self.align, showkeys=self.showkeynamesinheader)
+        self.drawSelections()
+        return
+
+    def redrawScrolled(self, event=None):
+        """Redraw after the view was scrolled. If the table layout did not
+           change since the last full redraw, the items of cells that stay
+           in view are kept and only the rows and columns that came into
+           view are drawn, otherwise the visible portion is redrawn"""
+
+        if self.drawnlayout is None or self.drawnlayout != self.getLayoutKey():
+            self.redrawVisible()
+            return
+        oldrows, oldcols = self.visiblerows, self.visiblecols
+        startvisiblerow, endvisiblerow = self.setVisibleRange()
+        rows, cols = self.visiblerows, self.visiblecols
+        if rows == oldrows and cols == oldcols:
+            return
+
+        #items are placed in canvas coordinates, so cells still in view need no update
+        def outside(key):
+            return key[0] not in rows or key[1] not in cols
+        for pool in [self.textpool, self.linkpool, self.fillpool]:
+            pool.hideIf(outside)
+        self.drawGrid(startvisiblerow, endvisiblerow)
+        align = self.align
+        #fit the texts of the exposed cells column by column, as in redrawVisible
+        newrows = [r for r in rows if r not in oldrows]
+        for col in cols:
+            if col in oldcols:
+                colrows = newrows
+            else:
+                colrows = rows
+            if len(colrows) == 0:
+                continue
+            texts = self.getColumnDisplayTexts(colrows, col)
+            for row, display in zip(colrows, texts):
+                self.drawCellContent(row, col, align, display=display)
+        self.lower('fillrect')
+        self.rowUpdate()
+
+        if cols != oldcols:
+            self.tablecolheader.redraw()
+        if rows != oldrows:
+            self.tablerowheader.redraw(align=self.align, showkeys=self.showkeynamesinheader)
+        self.drawSelections()
+        return
+
+    def getLayoutKey(self):
+        """Values that must be unchanged for a scroll to keep the drawn cells"""
+
+        model = self.model
+        if self.filtered == True and model.filteredrecs != None:
+            filteredrows = len(model.filteredrecs)
+        else:
+            filteredrows = None
+        return (id(model), model.getRowCount(), model.getColumnCount(), filteredrows,
+                getattr(model.rowheights, 'version', len(model.rowheights)),
+                len(model.columnwidths), self.thefont)
+
+    def setVisibleRange(self):
+        """Set the visible rows and columns from the current view and return
+           the first and last visible row"""
+
+        x1, y1, x2, y2 = self.getVisibleRegion()
+        startvisiblerow, endvisiblerow = self.getVisibleRows(y1, y2)
+        self.visiblerows = range(max(0, startvisiblerow-1), min(self.rows, endvisiblerow+1))
+        startvisiblecol, endvisiblecol = self.getVisibleCols(x1, x2)
+        self.visiblecols = range(max(0, startvisiblecol-1), min(endvisiblecol+1, self.cols))
+        return startvisiblerow, endvisiblerow
+
+    def drawCellContent(self, row, col, align=None, display=None):
+        """Draw the text and fill of a cell, display is the (text, fitted)
+           pair from getColumnDisplayTexts if already known"""
+
+        model = self.model
+        bgcolor = model.getColorAt(row,col, 'bg')
+        fgcolor = model.getColorAt(row,col, 'fg')
+        if display is None:
+            display = self.getCellDisplayText(row, col)
+        text, fitted = display
+        self.drawText(row, col, text, fgcolor, align, fitted=fitted)
+        if bgcolor != None:
+            self.drawRect(row,col, color=bgcolor)
+        return
+
+    def drawSelections(self):
+        """Draw the current row, column, cell and multiple selections"""
+
         #self.setSelectedRow(self.currentrow)
         self.drawSelectedRow()
         if self.find_withtag('colrect') != ():
@@ -443,12 +538,100 @@ class TableCanvas(Canvas):
             self.drawMultipleCells()
         return
 
+    def clearCellItems(self):
+        """Delete the canvas items of all cells and grid lines"""
+        for pool in [self.textpool, self.linkpool, self.fillpool, self.gridpool]:
+            pool.clear()
+        return
+
     def redrawTable(self, event=None, callback=None):
+        """Redraw the table now, or when the current batch ends if called
+           inside batchRedraw"""
+
+        if self.batchdepth > 0:
+            self.scheduleRedraw()
+            return
         self.redrawVisible(event, callback)
         return
 
     def redraw(self, event=None, callback=None):
-        self.redrawVisible(event, callback)
+        self.redrawTable(event, callback)
+        return
+
+    def newDirtyRegions(self):
+        """Return an empty record of the parts of the table to redraw"""
+        return {'all': False, 'cells': set(), 'rows': set(),
+                'headers': False, 'selection': False}
+
+    def scheduleRedraw(self, event=None, cells=None, rows=None, headers=False, selection=False):
+        """Mark parts of the table as changed, they are redrawn together once
+           Tk is idle. Without arguments the whole visible table is redrawn.
+        Args:
+            cells:      (row, col) pairs whose content changed
+            rows:       rows whose content changed
+            headers:    redraw the row and column headers
+            selection:  redraw the selection
+        """
+
+        dirty = self.dirty
+        if cells is None and rows is None and not headers and not selection:
+            dirty['all'] = True
+        if cells is not None:
+            dirty['cells'].update(cells)
+        if rows is not None:
+            dirty['rows'].update(rows)
+        dirty['headers'] = dirty['headers'] or headers
+        dirty['selection'] = dirty['selection'] or selection
+        if self.batchdepth == 0 and self.redrawjob is None:
+            self.redrawjob = self.after_idle(self.flushRedraw)
+        return
+
+    def flushRedraw(self):
+        """Redraw the parts marked by scheduleRedraw now"""
+
+        if self.redrawjob is not None:
+            self.after_cancel(self.redrawjob)
+            self.redrawjob = None
+        dirty = self.dirty
+        self.dirty = self.newDirtyRegions()
+        if not self.winfo_exists():
+            return
+        if dirty['all']:
+            self.redrawVisible()
+            return
+        if not hasattr(self, 'visiblerows'):
+            return
+        cells = dirty['cells']
+        for row in dirty['rows']:
+            cells.update((row, col) for col in self.visiblecols)
+        cells = [(row, col) for row, col in cells
+                    if row in self.visiblerows and col in self.visiblecols]
+        for row, col in cells:
+            self.drawText(row, col, self.model.getValueAt(row,col),
+                          self.model.getColorAt(row,col, 'fg'), self.align)
+            self.drawRect(row, col, color=self.model.getColorAt(row,col, 'bg'))
+        if len(cells) > 0:
+            self.rowUpdate()
+        if dirty['headers']:
+            self.tablecolheader.redraw()
+            self.tablerowheader.redraw(align=self.align, showkeys=self.showkeynamesinheader)
+        if dirty['selection'] or len(cells) > 0:
+            self.drawSelections()
+        return
+
+    @contextmanager
+    def batchRedraw(self):
+        """Context manager for applying many changes with one repaint.
+           Redraws requested inside it, including redrawTable calls, are
+           collected and done once when the outermost batch exits"""
+
+        self.batchdepth += 1
+        try:
+            yield self
+        finally:
+            self.batchdepth -= 1
+            if self.batchdepth == 0:
+                self.flushRedraw()
         return
 
     def deletePopups(self):
@@ -464,7 +647,7 @@ class TableCanvas(Canvas):
         """Redraw a specific cell only"""
 
         if row == None and recname != None:
-            row = self.model.getRecordIndex(recname)
+            row = self.model.getRecordIndex(recname, filtered=True)
         if col == None and colname != None:
             col = self.model.getColumnIndex(colname)
         bgcolor = self.model.getColorAt(row,col, 'bg')
@@ -472,8 +655,7 @@ class TableCanvas(Canvas):
         text = self.model.getValueAt(row,col)
         self.drawText(row, col, text, fgcolor)
         self.rowUpdate()
-        if bgcolor != None:
-            self.drawRect(row,col, color=bgcolor)
+        self.drawRect(row,col, color=bgcolor)
         return
 
     def adjustColumnWidths(self):
@@ -487,13 +669,18 @@ class TableCanvas(Canvas):
         except:
             fontsize = self.fontsize
         scale = 8.5 * float(fontsize)/12
+        #large tables are sampled, include the rows in view
+        if hasattr(self, 'visiblerows'):
+            visible = self.visiblerows
+        else:
+            visible = None
         for col in range(self.cols):
             colname = self.model.getColumnName(col)
             if colname in self.model.columnwidths:
                 w = self.model.columnwidths[colname]
             else:
                 w = self.cellwidth
-            maxlen = self.model.getlongestEntry(col)
+            maxlen = self.model.getlongestEntry(col, rows=visible)
             size = maxlen * scale
             if size < w:
                 continue
@@ -537,34 +724,25 @@ class TableCanvas(Canvas):
     def setColPositions(self):
         """Determine current column grid positions"""
 
-        self.col_positions=[]
         w=self.cellwidth
-        x_pos=self.x_start
-        self.col_positions.append(x_pos)
-        for col in range(self.cols):
-            colname=self.model.getColumnName(col)
-            if colname in self.model.columnwidths:
-                x_pos=x_pos+self.model.columnwidths[colname]
-            else:
-                x_pos=x_pos+w
-            self.col_positions.append(x_pos)
-        self.tablewidth = self.col_positions[len(self.col_positions)-1]
+        widths = self.model.columnwidths
+        sizes = [widths.get(self.model.getColumnName(col), w) for col in range(self.cols)]
+        #keep the positions if no width changed, resizeColumn updates them in place
+        if self.colsizes != (sizes, self.x_start):
+            self.col_positions = CumulativePositions(sizes, self.x_start)
+            self.colsizes = (sizes, self.x_start)
+        self.tablewidth = self.col_positions.end()
         return
 
     def setRowPositions(self):
         """Determine current row grid positions"""
 
-        self.row_positions=[]
-        h=self.rowheight
-        y_pos=self.y_start
-        self.row_positions.append(y_pos)
-        for row in range(self.rows):
-            if row in self.model.rowheights:
-                y_pos=y_pos+self.model.rowheights[row]
-            else:
-                y_pos=y_pos+h
-            self.row_positions.append(y_pos)
-        self.tableheight = self.row_positions[-1]
+        #offsets are computed on demand from the rows of non default height
+        if not isinstance(self.model.rowheights, RowHeights):
+            self.model.rowheights = RowHeights(self.model.rowheights)
+        self.row_positions = RowPositions(self.model.rowheights, self.rows,
+                                          self.rowheight, self.y_start)
+        self.tableheight = self.row_positions.end()
         return
 
     def sortTable(self, columnIndex=0, columnName=None, reverse=0):
@@ -579,7 +757,7 @@ class TableCanvas(Canvas):
 
         self.xview(*args)
         self.tablecolheader.xview(*args)
-        self.redrawVisible()
+        self.redrawScrolled()
         return
 
     def set_yviews(self,*args):
@@ -587,15 +765,15 @@ class TableCanvas(Canvas):
 
         self.yview(*args)
         self.tablerowheader.yview(*args)
-        self.redrawVisible()
+        self.redrawScrolled()
         return
 
     def addRow(self, key=None, **kwargs):
         """Add new row"""
 
         key = self.model.addRow(key, **kwargs)
-        self.redrawTable()
         self.setSelectedRow(self.model.getRecordIndex(key))
+        self.scheduleRedraw()
         return
 
     def addRows(self, num=None):
@@ -608,8 +786,8 @@ class TableCanvas(Canvas):
         if not num:
             return
         keys = self.model.autoAddRows(num)
-        self.redrawTable()
         self.setSelectedRow(self.model.getRecordIndex(keys[0]))
+        self.scheduleRedraw()
         return
 
     def addColumn(self, newname=None):
@@ -690,7 +868,7 @@ class TableCanvas(Canvas):
             for row in rows:
                 #absrow = self.get_AbsoluteRow(row)
                 self.model.deleteCellRecord(row, col)
-                self.redrawCell(row,col)
+        self.scheduleRedraw(cells=[(row, col) for row in rows for col in cols])
         return
 
     def clearData(self, evt=None):
@@ -775,10 +953,14 @@ class TableCanvas(Canvas):
         We simply pass the model search function to the the filtering
         class and that handles everything else.
         See filtering frame class for how searching is done.
+        doFilterCallback is called like TableFilter.doFiltering, the model
+        filters the rows with the indexes it keeps of its data.
         """
         if self.model==None:
             return
-        rowIds = doFilterCallback(self.model.data, self.model.getColumnDict())
+        rowIds = doFilterCallback(self.model.data, self.model.getColumnDict(),
+                                  filterfunction=self.model.doFiltering,
+                                  dataversion=self.model.dataversion)
         if rowIds is None:
             if self.model.filteredrecs is not None:
                 self.showAll()
@@ -790,7 +972,8 @@ class TableCanvas(Canvas):
         return
 
     def triggerSorting(self, doSortCallback):
-        """Function that is called when the sorting of the data is triggered."""
+        """Function that is called when the sorting of the data is triggered.
+        doSortCallback sorts the rows in place like TableSorter.doSorting."""
         doSortCallback((self.model.data, self.model.reclist), self.model.getColumnDict())
         self.redrawTable()
         return
@@ -799,11 +982,14 @@ class TableCanvas(Canvas):
         """Resize a column by dragging"""
 
         #print 'resizing column', col
-        #recalculate all col positions..
+        #only the positions of the following columns shift
         self.requireRowHeightReset()
         colname=self.model.getColumnName(col)
         self.model.columnwidths[colname]=width
-        self.setColPositions()
+        self.col_positions.update(col, width)
+        if self.colsizes is not None and col < len(self.colsizes[0]):
+            self.colsizes[0][col] = width
+        self.tablewidth = self.col_positions.end()
         self.redrawTable()
         self.drawSelectedCol(self.currentcol)
         return
@@ -814,7 +1000,8 @@ class TableCanvas(Canvas):
         if height < self.minrowheights[row]:
             height = self.minrowheights[row]
         self.model.rowheights[row]=height
-        self.setRowPositions()
+        self.row_positions.update(row, height)
+        self.tableheight = self.row_positions.end()
         self.redrawTable()
         self.drawSelectedRow(self.currentrow)
         return
@@ -855,39 +1042,22 @@ class TableCanvas(Canvas):
     def get_row_clicked(self, event):
         """get row where event on canvas occurs"""
 
-        h=self.rowheight
         #get coord on canvas, not window, need this if scrolling
         y = int(self.canvasy(event.y))
-        y_start=self.y_start
-
-        for idx, rowpos in enumerate(self.row_positions):
-            try:
-                nextpos = self.row_positions[idx+1]
-            except:
-                nextpos = self.tableheight
-            if y > rowpos and y <= nextpos:
-                return idx
+        #row idx has rowpos < y <= nextpos
+        i = self.row_positions.find(y)
+        if 0 < i < len(self.row_positions):
+            return i-1
+        return None
 
     def get_col_clicked(self,event):
         """get col where event on canvas occurs"""
 
-        w=self.cellwidth
         x = int(self.canvasx(event.x))
-        x_start=self.x_start
-        for idx, colpos in enumerate(self.col_positions):
-            try:
-                # nextpos=self.col_positions[self.col_positions.index(colpos)+1]
-                nextpos = self.col_positions[idx+1]
-            except:
-                nextpos = self.tablewidth
-                
-            if x > colpos and x <= nextpos:
-                #print 'x=', x, 'colpos', colpos, idx
-                return idx
-            else:
-                #print None
-                pass
-        #return colc
+        i = self.col_positions.find(x)
+        if 0 < i < len(self.col_positions):
+            return i-1
+        return None
 
     def setSelectedRow(self, row):
         """Set currently selected row and reset multiple row list"""
@@ -1284,7 +1454,7 @@ class TableCanvas(Canvas):
 
     def movetoSelectedRow(self, row=None, recname=None):
         """Move to selected row, updating table"""
-        row=self.model.getRecordIndex(recname)
+        row=self.model.getRecordIndex(recname, filtered=True)
         self.setSelectedRow(row)
         self.drawSelectedRow()
         x,y = self.getCanvasPos(row, 0)
@@ -1677,23 +1847,24 @@ class TableCanvas(Canvas):
 
     def drawGrid(self, startrow, endrow):
         """Draw the table grid lines"""
-        self.delete('gridline','text')
         rows=len(self.rowrange)
         cols=self.cols
         x_start=self.x_start
         y_start=self.y_start
         x_pos=x_start
-
+        pool = self.gridpool
+        pool.beginFrame()
         if self.vertlines==1:
             for col in range(cols+1):
                 x=self.col_positions[col]
-                self.create_line(x,y_start,x,self.tableheight, tag='gridline',
+                pool.draw(('v',col), (x,y_start,x,self.tableheight), tags='gridline',
                                      fill=self.grid_color, width=self.linewidth)
         if self.horizlines==1:
             for row in range(startrow, endrow+1):
                 y_pos=self.row_positions[row]
-                self.create_line(x_start,y_pos,self.tablewidth,y_pos, tag='gridline',
+                pool.draw(('h',row), (x_start,y_pos,self.tablewidth,y_pos), tags='gridline',
                                     fill=self.grid_color, width=self.linewidth)
+        pool.endFrame()
         return
 
     def drawRowHeader(self):
@@ -1740,25 +1911,31 @@ class TableCanvas(Canvas):
         return
 
     def drawRect(self, row, col, color=None, tag=None, delete=1):
-        """Cell is colored"""
-        if delete==1:
-            self.delete('cellbg'+str(row)+str(col))
+        """Cell is colored, the fill of a cell is kept in the fill
+           item pool unless another tag is given"""
         if color==None or color==self.bgcolor:
+            if tag==None:
+                self.fillpool.hide((row, col))
             return
         else:
             bg=color
-        if tag==None:
-            recttag='fillrect'
-        else:
-            recttag=tag
         w=1
         x1,y1,x2,y2 = self.getCellCoords(row,col)
+        if tag==None:
+            self.fillpool.draw((row, col), (x1+w/2,y1+w/2,x2-w/2,y2-w/2),
+                                  fill=bg,
+                                  outline=bg,
+                                  width=w,
+                                  tags='fillrect')
+            if not self.fillpool.inFrame():
+                self.lower('fillrect')
+            return
         rect = self.create_rectangle(x1+w/2,y1+w/2,x2-w/2,y2-w/2,
                                   fill=bg,
                                   outline=bg,
                                   width=w,
-                                  tag=(recttag,'cellbg'+str(row)+str(col)))
-        self.lower(recttag)
+                                  tag=tag)
+        self.lower(tag)
         return
 
     def drawCellEntry(self, row, col, text=None):
@@ -1867,30 +2044,95 @@ class TableCanvas(Canvas):
         return 1
 
     def estimateWordLength(self, word: str):
-        if len(word) == 0:
-            return 0
-        lens = list(map(lambda x: self.fontSizeTable[x], word))
-        return sum(lens)-(len(word)-1)*2
+        return self.fontSizeTable.measureText(word)
     
     def estimateWordLengthCumulated(self, word: str):
         if len(word) == 0:
             return []
-        lens = list(map(lambda x: self.fontSizeTable[x]-2, word))
-        lens[0] += 2
-        return np.cumsum(lens)
+        return self.fontSizeTable.cumulativeWidths(word)
 
     def truncateToWidth(self, word: str, width):
-        llist = self.estimateWordLengthCumulated(word)
-        if bisect_left(llist, width) < len(word):
-            idx = bisect_left(llist, width-3*(self.fontSizeTable['.']-2))
-            return word[:idx]+"..."
-        else:
-            return word
+        return self.fontSizeTable.truncate(word, width)
+
+    def fitText(self, celltxt, w, multiline=False):
+        """Return the text shown for celltxt in a cell with text width w"""
 
-    def drawText(self, row, col, celltxt, fgcolor=None, align=None):
-        """Draw the text inside a cell area"""
+        if w < 18:
+            return '.'
+        elif not multiline and isinstance(celltxt, str):
+            return self.truncateToWidth(celltxt, w)
+        return celltxt
+
+    def getCellDisplayText(self, row, col):
+        """Return the text shown in a cell and whether it is already fitted
+           to the cell width, see getColumnDisplayTexts"""
+        return self.getColumnDisplayTexts([row], col)[0]
+
+    def getColumnDisplayTexts(self, rows, col):
+        """Return (text, fitted) for the given rows of a column, fitted is
+           True if the text is already fitted to the cell width.
+           Fitted texts are kept in the display cache and reused while the
+           raw cell value, column width and font are the same. The single
+           line texts that are not cached are truncated together in one
+           vectorized pass. Formulas and links are not cached."""
 
-        self.delete('celltext'+str(col)+'_'+str(row))
+        model = self.model
+        colname = model.getColumnName(col)
+        coltype = model.columntypes[colname]
+        w = self.col_positions.size(col)-2*self.xpadding
+        font = self.thefont
+        cache = self.displaycache
+        result = []
+        pending = []
+        for i, row in enumerate(rows):
+            recname = model.getRecName(row)
+            record = model.data[recname]
+            if colname in record:
+                cell = record[colname]
+            else:
+                cell = None
+            if type(cell) is dict:
+                result.append((model.getValueAt(row, col), False))
+                continue
+            multiline = self.isMultiline(row, colname)
+            key = (recname, colname)
+            entry = cache.get(key)
+            if (entry is not None and type(entry[0]) is type(cell) and entry[0] == cell
+                    and entry[1:4] == (w, font, multiline)):
+                result.append((entry[4], True))
+                continue
+            text = model.formatCell(cell, coltype)
+            if type(text) is float or type(text) is int:
+                text = str(text)
+            result.append(None)
+            pending.append((i, key, cell, multiline, text))
+        if len(pending) == 0:
+            return result
+
+        batch = [p for p in pending if not p[3] and isinstance(p[4], str) and len(p[4]) > 0]
+        if w >= 18 and len(batch) > 0:
+            fitted = self.fontSizeTable.truncateMany([p[4] for p in batch], w)
+            texts = {p[0]: t for p, t in zip(batch, fitted)}
+        else:
+            texts = {}
+        if len(cache)+len(pending) > self.displaycachesize:
+            cache.clear()
+        for i, key, cell, multiline, text in pending:
+            if i in texts:
+                text = texts[i]
+            elif len(text) > 0 and w > 10:
+                text = self.fitText(text, w, multiline)
+            cache[key] = (cell, w, font, multiline, text)
+            result[i] = (text, True)
+        return result
+
+    def drawText(self, row, col, celltxt, fgcolor=None, align=None, fitted=False):
+        """Draw the text inside a cell area, the text items are kept in
+           the item pools and reused on the next redraw. If fitted is True
+           celltxt has already been fitted to the cell width"""
+
+        key = (row, col)
+        celltag = 'celltext'+str(col)+'_'+str(row)
         h=self.rowheight
         pad=self.xpadding
         x1,y1,x2,y2 = self.getCellCoords(row,col)
@@ -1904,10 +2146,10 @@ class TableCanvas(Canvas):
         if type(celltxt) is float or type(celltxt) is int:
             celltxt=str(celltxt)
         length = len(celltxt)
-        if length == 0:
-            return
         #if cell width is less than x, print nothing
-        if w<=10:
+        if length == 0 or w<=10:
+            self.textpool.hide(key)
+            self.linkpool.hide(key)
             return
 
         if fgcolor == None or fgcolor == "None":
@@ -1919,10 +2161,8 @@ class TableCanvas(Canvas):
         elif align == 'e':
             x1 = x1+w/2-pad
 
-        if w < 18:
-            celltxt = '.'
-        elif not multiline:
-            celltxt = self.truncateToWidth(celltxt, w)
+        if not fitted:
+            celltxt = self.fitText(celltxt, w, multiline)
             ##scaling between canvas and text normalised to about font 14
             #scale = 8.5 * float(fontsize)/12
             #size = length * scale
@@ -1946,23 +2186,27 @@ class TableCanvas(Canvas):
                 linkfont = self.thefont
                 linkcolor=fgcolor
 
-            rect = self.create_text(x1+w/2,y1+h/2,
+            if haslink == 1:
+                tags = ('text','hlink',celltag)
+            else:
+                tags = ('text',celltag)
+            self.textpool.hide(key)
+            rect = self.linkpool.draw(key, (x1+w/2,y1+h/2),
                                       text=linktext,
                                       fill=linkcolor,
                                       font=linkfont,
-                                      tag=('text','hlink','celltext'+str(col)+'_'+str(row)))
-            if haslink == 1:
-                self.tag_bind(rect, '<Double-Button-1>', self.check_hyperlink)
+                                      tags=tags)
 
         #just normal text
         else:
+            self.linkpool.hide(key)
             if multiline:
-                rect = self.create_text(x1+w/2,y1+1,
+                rect = self.textpool.draw(key, (x1+w/2,y1+1),
                                       text=celltxt,
                                       fill=fgcolor,
                                       font=self.thefont,
                                       anchor="n"+align,
-                                      tag=('text','celltext'+str(col)+'_'+str(row)),
+                                      tags=('text',celltag),
                                       width=w,
                                       justify='left')
                 box = self.bbox(rect)
@@ -1976,12 +2220,14 @@ class TableCanvas(Canvas):
                     self.rowUpdateRequired = True
 
             else:
-                rect = self.create_text(x1+w/2,y1+1,
+                rect = self.textpool.draw(key, (x1+w/2,y1+1),
                                       text=celltxt,
                                       fill=fgcolor,
                                       font=self.thefont,
                                       anchor="n"+align,
-                                      tag=('text','celltext'+str(col)+'_'+str(row)))
+                                      tags=('text',celltag),
+                                      width=0,
+                                      justify='left')
         return
 
     def isLink(self, cell):
@@ -2014,7 +2260,7 @@ class TableCanvas(Canvas):
             self.rowUpdateRequired = False
             self.resetToMinRowHeight = False
             self.setRowPositions()
-            self.redrawTable()
+            self.scheduleRedraw()
             if self.find_withtag('rowrect') != ():
                 self.drawSelectedRow(self.currentrow)
         return
@@ -2360,6 +2606,9 @@ class TableCanvas(Canvas):
             print (e)
             pass
         self.prefs.save_prefs()
+        metricsdir = self.getMetricsDir()
+        if metricsdir is not None:
+            saveFontMetrics(metricsdir)
         return
 
     def applyPrefs(self):
@@ -2537,10 +2786,10 @@ class TableCanvas(Canvas):
     @staticmethod
     def within(val, l, d):
         """Utility funtion to see if val is within d of any
-            items in the list l"""
-        for idx, v in enumerate(l):
-            if abs(val-v) <= d:
-                return idx
+            items in the sorted list l"""
+        idx = bisect_left(l, val-d)
+        if idx < len(l) and l[idx] <= val+d:
+            return idx
         return -1
 
 class ColumnHeader(Canvas):
@@ -2551,6 +2800,9 @@ class ColumnHeader(Canvas):
         Canvas.__init__(self, parent, bg='gray25', width=500, height=20)
         self.thefont='Arial 14'
         self.atdivider = -1
+        #label and divider items, kept between redraws
+        self.textpool = CanvasItemPool(self, 'text')
+        self.linepool = CanvasItemPool(self, 'line')
 
         if table != None:
             self.table = table
@@ -2578,7 +2830,6 @@ class ColumnHeader(Canvas):
         cols = self.model.getColumnCount()
         self.tablewidth=self.table.tablewidth
         self.configure(scrollregion=(0,0, self.table.tablewidth+self.table.x_start, self.height))
-        self.delete('gridline','text')
         self.delete('rect')
         self.atdivider = -1
         align='w'
@@ -2586,7 +2837,12 @@ class ColumnHeader(Canvas):
         h=self.height
         #x_start=self.table.x_start
 
+        textpool, linepool = self.textpool, self.linepool
+        textpool.beginFrame()
+        linepool.beginFrame()
         if cols == 0:
+            textpool.endFrame()
+            linepool.endFrame()
             return
         for col in self.table.visiblecols:
             colname = self.model.columnNames[col]
@@ -2601,21 +2857,22 @@ class ColumnHeader(Canvas):
 
             if len(collabel)>w/10:
                 collabel = collabel[0:int(w/12)]+'.'
-            line = self.create_line(x, 0, x, h, tag=('gridline', 'vertline'),
+            line = linepool.draw(col, (x, 0, x, h), tags=('gridline', 'vertline'),
                                  fill='white', width=2)
 
-            self.create_text(x+pad,h/2,
+            textpool.draw(col, (x+pad,h/2),
                             text=collabel,
                             anchor=align,
                             fill='white',
                             font=self.thefont,
-                            tag='text')
+                            tags='text')
 
 
         x=self.table.col_positions[col+1]
-        self.create_line(x,0, x,h, tag='gridline',
+        linepool.draw('end', (x,0, x,h), tags='gridline',
                         fill='white', width=2)
-
+        textpool.endFrame()
+        linepool.endFrame()
         return
 
     def handle_left_click(self,event):
@@ -2857,6 +3114,9 @@ class RowHeader(Canvas):
     def __init__(self, parent=None, table=None, width=40):
         Canvas.__init__(self, parent, bg='gray75', width=width, height=None)
         self.atrowdivider = -1
+        #row label items, kept between redraws
+        self.textpool = CanvasItemPool(self, 'text')
+        self.rectpool = CanvasItemPool(self, 'rectangle')
 
         if table != None:
             self.table = table
@@ -2881,7 +3141,6 @@ class RowHeader(Canvas):
         rows = self.model.getRowCount()
         self.height = self.table.tableheight #+10 ??
         self.configure(scrollregion=(0,0, self.width, self.height))
-        self.delete('rowheader','text')
         self.delete('rect')
         w = float(self.width)
         x = self.x_start+w/2
@@ -2889,7 +3148,12 @@ class RowHeader(Canvas):
             x = x-w/2+3
         elif align == 'e':
             x = x+w/2-3
+        textpool, rectpool = self.textpool, self.rectpool
+        textpool.beginFrame()
+        rectpool.beginFrame()
         if rows == 0:
+            textpool.endFrame()
+            rectpool.endFrame()
             return
         for row in self.table.visiblerows:
             if showkeys == True:
@@ -2901,16 +3165,18 @@ class RowHeader(Canvas):
                 h = self.model.rowheights[row]
             else:
                 h = self.table.rowheight
-            self.create_rectangle(0,y1,w-1,y2,
+            rectpool.draw(row, (0,y1,w-1,y2),
                                       fill='gray75',
                                       outline='white',
                                       width=1,
-                                      tag='rowheader')
-            self.create_text(x,y1+h/2,
+                                      tags='rowheader')
+            textpool.draw(row, (x,y1+h/2),
                                       text=text,
                                       fill='black',
                                       font=self.table.thefont,
-                                      tag='text', anchor=align)
+                                      tags='text', anchor=align)
+        textpool.endFrame()
+        rectpool.endFrame()
         return
 
     def setWidth(self, w):
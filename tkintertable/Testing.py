@@ -176,6 +176,27 @@ def test4():
 	#createTable(model)
 	return
 
+def sortBenchmark(rows=100000, keys=4):
+	"""Compare the single pass and the per key sorting of Sorting.doSorting"""
+
+	import time
+	from .Sorting import doSorting
+	colnames = createRandomStrings(keys,5)
+	data = {}
+	for i in range(rows):
+		data[i] = {c: random.choice([round(random.random(),1), random.randint(0,20)]) for c in colnames}
+		data[i][colnames[0]] = random.choice(['a','b','c','d'])
+	spec = [(c, i%2==1) for i,c in enumerate(colnames)]
+	results = {}
+	for composite in (True, False):
+		keylist = list(data.keys())
+		start = time.time()
+		doSorting((data, keylist), spec, composite=composite)
+		results[composite] = (time.time()-start, keylist)
+	print ('single pass: %.3fs, per key: %.3fs' %(results[True][0], results[False][0]))
+	assert results[True][1] == results[False][1]
+	return
+
 def GUITests():
 	"""Run standard tests"""
 
@@ -0,0 +1,199 @@
+"""
+Column-wise filtering of table data.
+
+Provides FilterFrame, which keeps the columns of a list or dict of row dicts
+as arrays and evaluates the filter tuples of FilterPanel and FilterDialog
+with NumPy and pandas string operations instead of row by row. The results
+are the same as those of CellContentOperators.doFiltering.
+"""
+
+from collections.abc import Mapping
+import numpy as np
+import pandas
+
+from .CellContentOperators import compileFilter, floatops
+
+_MISSING = object()
+
+
+class _FilterColumn(object):
+    """The values of one column in the forms needed by the operators,
+       the forms are created on first use"""
+
+    def __init__(self, values):
+        self.values = values            # object array, _MISSING where the row has no value
+        self.present = np.fromiter((v is not _MISSING for v in values), dtype=bool, count=len(values))
+        self._strings = None
+        self._lowered = None
+        self._numbers = None
+        self._isnumber = None
+        return
+
+    def strings(self):
+        """The values converted with str, as a pandas Series"""
+        if self._strings is None:
+            self._strings = pandas.Series([str(v) for v in self.values], dtype=object)
+        return self._strings
+
+    def lowered(self):
+        if self._lowered is None:
+            self._lowered = self.strings().str.lower()
+        return self._lowered
+
+    def numbers(self):
+        """The values converted with float and the mask of the values for
+           which this worked"""
+        if self._numbers is None:
+            numbers = np.full(len(self.values), np.nan)
+            isnumber = np.zeros(len(self.values), dtype=bool)
+            for i, v in enumerate(self.values):
+                if v is _MISSING:
+                    continue
+                try:
+                    numbers[i] = float(v)
+                    isnumber[i] = True
+                except (ValueError, TypeError, OverflowError):
+                    pass
+            self._numbers = numbers
+            self._isnumber = isnumber
+        return self._numbers, self._isnumber
+
+
+class FilterFrame(object):
+    """
+    Column arrays of a list or dict of row dicts, used to filter the rows
+    with whole column operations. The columns are taken from the rows on
+    first use and kept, call clear if the data changes.
+    """
+
+    def __init__(self, data):
+        """
+        Args:
+            data:   list of row dicts or dict of row name -> row dict
+        """
+        if isinstance(data, Mapping):
+            self.rowids = list(data.keys())
+            self.rows = list(data.values())
+        elif isinstance(data, list):
+            self.rowids = None
+            self.rows = data
+        else:
+            raise RuntimeError("Unexpected data type.")
+        self._columns = {}
+        return
+
+    def __len__(self):
+        return len(self.rows)
+
+    def clear(self):
+        """Drop the cached columns"""
+        self._columns = {}
+        return
+
+    def getColumn(self, colname):
+        column = self._columns.get(colname)
+        if column is None:
+            values = np.empty(len(self.rows), dtype=object)
+            values[:] = [row.get(colname, _MISSING) for row in self.rows]
+            column = _FilterColumn(values)
+            self._columns[colname] = column
+        return column
+
+    def _textMask(self, column, value, op):
+        """Mask of the rows whose str value passes a text operator, None if
+           the operator has no column-wise form"""
+        if not isinstance(value, str):
+            return None
+        if op in ('=', 'on'):
+            return (column.strings() == value).to_numpy(dtype=bool)
+        if op == '!=':
+            return (column.strings() != value).to_numpy(dtype=bool)
+        if op in ('>', 'since'):
+            return (column.strings() > value).to_numpy(dtype=bool)
+        if op in ('<', 'before'):
+            return (column.strings() < value).to_numpy(dtype=bool)
+        if op == 'contains':
+            return column.strings().str.contains(value, regex=False).to_numpy(dtype=bool)
+        if op == 'excludes':
+            return ~column.strings().str.contains(value, regex=False).to_numpy(dtype=bool)
+        if op == 'starts with':
+            return column.strings().str.startswith(value).to_numpy(dtype=bool)
+        if op == 'ends with':
+            return column.strings().str.endswith(value).to_numpy(dtype=bool)
+        if op == 'contains (c.ins.)':
+            return column.lowered().str.contains(value.lower(), regex=False).to_numpy(dtype=bool)
+        if op == 'starts with (c.ins.)':
+            return column.lowered().str.startswith(value.lower()).to_numpy(dtype=bool)
+        if op == 'ends with (c.ins.)':
+            return column.lowered().str.endswith(value.lower()).to_numpy(dtype=bool)
+        if op == 'regex':
+            return column.strings().str.contains(value, regex=True).to_numpy(dtype=bool)
+        return None
+
+    def getMask(self, filtercol, value, op='contains', columndict=None):
+        """Return the boolean mask of the rows passing one filter term"""
+
+        if columndict is not None:
+            filtercolname = columndict[filtercol]
+        else:
+            filtercolname = filtercol
+        column = self.getColumn(filtercolname)
+        mask = self._textMask(column, value, op)
+        if mask is None:
+            # no column-wise form, test the rows one by one
+            passes = compileFilter(filtercolname, value, op)
+            return np.fromiter((passes(row) for row in self.rows), dtype=bool, count=len(self.rows))
+        if op in floatops:
+            try:
+                number = float(value)
+            except (ValueError, TypeError):
+                number = None
+            if number is not None:
+                numbers, isnumber = column.numbers()
+                with np.errstate(invalid='ignore'):
+                    if op == '=':
+                        numeric = numbers == number
+                    elif op == '>':
+                        numeric = numbers > number
+                    else:
+                        numeric = numbers < number
+                # values that are no numbers are compared as text
+                mask = np.where(isnumber, numeric, mask)
+        return mask & column.present
+
+    def getFilterMask(self, filters, columndict=None):
+        """Return the boolean mask of the rows passing a list of filter
+           tuples of the form (key,value,operator,bool)"""
+
+        col, val, op, _ = filters[0]
+        mask = self.getMask(col, val, op, columndict)
+        for col, val, op, boolean in filters[1:]:
+            if boolean == 'AND':
+                mask &= self.getMask(col, val, op, columndict)
+            elif boolean == 'OR':
+                mask |= self.getMask(col, val, op, columndict)
+            elif boolean == 'NOT':
+                mask &= ~self.getMask(col, val, op, columndict)
+        return mask
+
+    def doFiltering(self, filters=None, columndict=None):
+        """
+        Filter the rows, same as CellContentOperators.doFiltering.
+        Returns the positions of the rows passing the filters in data order,
+        or the row names for dict data, None if there are no filters.
+        """
+        if filters is None or len(filters) == 0:
+            return None
+        ids = np.flatnonzero(self.getFilterMask(filters, columndict))
+        if self.rowids is None:
+            return ids.tolist()
+        return [self.rowids[i] for i in ids.tolist()]
+
+
+def doFiltering(data, columndict=None, filters=None):
+    """Module level method, the column-wise counterpart of
+       CellContentOperators.doFiltering with the same arguments and result"""
+
+    if filters == None or len(filters) == 0:
+        return None
+    return FilterFrame(data).doFiltering(filters, columndict)
@@ -24,12 +24,16 @@
 from .Tables import *
 from .TableModels import *
 from .MultipageTable import *
+from .ColumnarData import ColumnarData
 
 from .SortingPanel import SortingPanel
-from .Sorting import TableSorter, doSorting
+from .Sorting import TableSorter, doSorting, getSortPermutation, getSortedHead
 
 from .FilterPanel import FilterPanel
 from .Filtering import TableFilter
+from .VectorizedFiltering import FilterFrame
+from .FilterIndexes import FilterIndexes, TrigramIndex, SortedIndex
+from .ParallelFiltering import ParallelFilter
 from .FilterDialogFactory import FilterDialogFactory
 from .FilterDialogFactoryInterface import FilterDialogFactoryInterface
 